@@ -1,93 +1,213 @@
 # algorithms.py
 
-from queue import PriorityQueue
+import time
+
+from app.cells import CELLS
+from app.solver import HEURISTICS, SOLVER
+from app.worker import WORKER
 
 class ALGORITHMS:
-    """ This class has a bunch of algorithms. """
+    """
+    This class has a bunch of algorithms. They visualize the searches of app/solver.py on the Grid.
+
+    Every *_steps method returns a stepper : a generator making one visual step (an expanded cell
+    or a cell of the path) each time it is advanced, so the main loop can run it within a time
+    budget per frame. Its return value (True if a path has been found) is given by ALGORITHMS.finish.
+    Given a worker (see app/worker.py), the A*, Breadth First and Jump Point searches run in a background
+    thread on a snapshot of the grid, and their stepper only colors what the search has logged.
+    With junctions, the A* and Breadth First searches run on the junction graph of the grid instead (see
+    app/junctions.py), built and updated in the worker too.
+    """
+
+    # yielded by a stepper waiting for its background worker : nothing more to do in this frame
+    WAIT = 'wait'
 
     @staticmethod
-    def h(p1, p2):
-        x1, y1 = p1
-        x2, y2 = p2
-        return abs(x1 - x2) + abs(y1 - y2)
+    def finish(steps, **kwargs):
+        """ Runs a stepper to the end, calling visualize after every step. Returns True if a path has been found. """
+        visualize = kwargs.get('visualize')
+        try:
+            while True:
+                if next(steps) is ALGORITHMS.WAIT:
+                    # let the worker thread run
+                    time.sleep(0.001)
+                    continue
+                if visualize:
+                    visualize()
+        except StopIteration as stop:
+            return stop.value
 
     @staticmethod
-    def reconstruct_path(came_from, current, **kwargs):
-        while current in came_from:
-            current = came_from[current]
-            current.make_path()
-            if kwargs.get('visualize'):
-                kwargs.get('visualize')()
+    def reconstruct_path(path):
+        """ Colors the spots of the path (start to end), from the end back to the start, one step per spot. """
+        for spot in reversed(path[:-1]):
+            spot.make_path()
+            yield
 
     @staticmethod
-    def A_star(grid_obj, start, end, **kwargs):
-        grid = grid_obj.Grid
-        count = 0
-        open_set = PriorityQueue()
-        open_set.put((0, count, start))
-        came_from = {}
-        g_score = {spot: float("inf") for row in grid for spot in row}
-        g_score[start] = 0
-        f_score = {spot: float("inf") for row in grid for spot in row}
-        f_score[start] = ALGORITHMS.h(start.get_pos(), end.get_pos())
-
-        open_set_hash = {start}
-
-        while not open_set.empty():
-            current = open_set.get()[2]
-            open_set_hash.remove(current)
-
-            if current == end:
-                ALGORITHMS.reconstruct_path(came_from, end, **kwargs)
-                start.make_start()
-                end.make_end()
-                return True
-
-            for neighbor in current.neighbors:
-                temp_g_score = g_score[current] + 1
-
-                if temp_g_score < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = temp_g_score
-                    f_score[neighbor] = temp_g_score + ALGORITHMS.h(neighbor.get_pos(), end.get_pos())
-                    if neighbor not in open_set_hash:
-                        count += 1
-                        open_set.put((f_score[neighbor], count, neighbor))
-                        open_set_hash.add(neighbor)
-                        neighbor.make_open()
-
-            if current != start:
-                current.make_closed()
-            
-            if kwargs.get('visualize'):
-                kwargs.get('visualize')()
-
-        return False
-    
+    def run(search, grid_obj, start, end, stats=None):
+        """
+            Stepper following a headless search generator, measured by stats if given (see app/stats.py), then coloring its result.
+            The search isn't started when the connected components of the grid (see app/components.py) tell at once that end
+            can't be reached : they are only built and updated by the background searches (see ALGORITHMS.replay).
+        """
+        components = grid_obj.components
+        if components is not None and components.known_connected(start.get_pos(), end.get_pos()) is False:
+            search.close()
+            return False
+        if stats is not None:
+            search = stats.measure(search)
+        result = yield from search
+        if result is None or not result.found:
+            return False
+
+        yield from ALGORITHMS.reconstruct_path([grid_obj.get_spot(row, col) for row, col in result.path])
+        start.make_start()
+        end.make_end()
+        return True
+
     @staticmethod
-    def breadth_first_search(start, end, **kwargs):
+    def replay(grid_obj, worker, steps, start, end, links=True, **kwargs):
+        """
+            Search generator running a headless search in a background worker, on a snapshot of the grid
+            (see Grid.snapshot and WORKER.search for the arguments), and coloring the cells it logs, one per step, as they come.
+            It yields ALGORITHMS.WAIT while the worker is behind and returns the result of the search, None
+            if the job has been cancelled (e.g. by a newer one). Closing it cancels the job.
+        """
+        cells, grid_links = grid_obj.snapshot()
+        if links:
+            kwargs['links'] = grid_links
+        # the worker checks the end can be reached before searching (building the components the first time)
+        kwargs['components'] = grid_obj.components
+        job = worker.submit(WORKER.search, steps, cells, grid_obj.cols, start.get_pos(), end.get_pos(), **kwargs)
+        events, cells, read = job.events, grid_obj.cells, 0
+        try:
+            while True:
+                # read before the log : once done, every event of the job is in the log
+                done = job.done()
+                if read < len(events):
+                    index, state = events[read] >> 3, events[read] & 7
+                    read += 1
+                    # a cell walled since the snapshot keeps its wall
+                    if cells[index] != CELLS.BARRIER:
+                        grid_obj.set_state(index, state)
+                    yield index
+                elif done:
+                    return job.result()
+                else:
+                    yield ALGORITHMS.WAIT
+        except GeneratorExit:
+            job.cancel()
+            raise
 
-        visited_spots = [start]
-        queue = [start]
-        came_from = {}
+    @staticmethod
+    def junction_replay(grid_obj, worker, start, end, heuristic, stats=None):
+        """ ALGORITHMS.replay of a search on the junction graph of the grid (see JUNCTION_GRAPH.search_steps), coloring the junctions it expands. """
+        return ALGORITHMS.replay(grid_obj, worker, grid_obj.junctions.search_steps, start, end, links=False,
+                                 expand_state=CELLS.CLOSED, heuristic=heuristic, stats=stats)
 
-        while queue:
-            spot = queue.pop(0)
+    @staticmethod
+    def A_star_steps(grid_obj, start, end, heuristic=HEURISTICS.manhattan, tie_break='high_g', stats=None, worker=None, junctions=False):
+        if worker is not None and junctions and grid_obj.junctions is not None:
+            return ALGORITHMS.run(ALGORITHMS.junction_replay(grid_obj, worker, start, end, heuristic, stats), grid_obj, start, end)
+        if worker is not None:
+            search = ALGORITHMS.replay(grid_obj, worker, SOLVER.a_star_steps, start, end, push_state=CELLS.OPEN,
+                                       expand_state=CELLS.CLOSED, heuristic=heuristic, tie_break=tie_break, stats=stats)
+            return ALGORITHMS.run(search, grid_obj, start, end)
+
+        def on_push(index):
+            grid_obj.set_state(index, CELLS.OPEN)
+
+        def on_expand(index):
+            if index != start.index:
+                grid_obj.set_state(index, CELLS.CLOSED)
+
+        search = SOLVER.a_star_steps(grid_obj.cells, grid_obj.cols, start.get_pos(), end.get_pos(),
+                                     on_push=on_push, on_expand=on_expand, links=grid_obj.links,
+                                     heuristic=heuristic, tie_break=tie_break, stepping=True, stats=stats)
+        return ALGORITHMS.run(search, grid_obj, start, end, stats)
 
-            if spot == end:
-                ALGORITHMS.reconstruct_path(came_from, end, **kwargs)
-                start.make_start()
-                end.make_end()
-                return True
+    @staticmethod
+    def breadth_first_search_steps(grid_obj, start, end, bidirectional=False, stats=None, worker=None, junctions=False):
+        steps = SOLVER.bidirectional_bfs_steps if bidirectional else SOLVER.bfs_steps
+        if worker is not None and junctions and grid_obj.junctions is not None:
+            # no heuristic : a Dijkstra search on the weighted edges, shortest like the BFS
+            return ALGORITHMS.run(ALGORITHMS.junction_replay(grid_obj, worker, start, end, HEURISTICS.zero, stats), grid_obj, start, end)
+        if worker is not None:
+            search = ALGORITHMS.replay(grid_obj, worker, steps, start, end, push_state=CELLS.CLOSED, stats=stats)
+            return ALGORITHMS.run(search, grid_obj, start, end)
+
+        def on_push(index):
+            grid_obj.set_state(index, CELLS.CLOSED)
+
+        search = steps(grid_obj.cells, grid_obj.cols, start.get_pos(), end.get_pos(),
+                       on_push=on_push, links=grid_obj.links, stepping=True, stats=stats)
+        return ALGORITHMS.run(search, grid_obj, start, end, stats)
 
-            for neighbor in spot.neighbors:
-                if neighbor not in visited_spots:
-                    came_from[neighbor] = spot
-                    visited_spots.append(neighbor)
-                    queue.append(neighbor)
-                    neighbor.make_closed()
+    @staticmethod
+    def jump_point_search_steps(grid_obj, start, end, stats=None, worker=None):
+        if worker is not None:
+            search = ALGORITHMS.replay(grid_obj, worker, SOLVER.jump_point_search_steps, start, end, links=False,
+                                       push_state=CELLS.OPEN, expand_state=CELLS.CLOSED, stats=stats)
+            return ALGORITHMS.run(search, grid_obj, start, end)
 
-            if kwargs.get('visualize'):
-                kwargs.get('visualize')()
+        def on_push(index):
+            grid_obj.set_state(index, CELLS.OPEN)
 
-        return False
+        def on_expand(index):
+            if index != start.index:
+                grid_obj.set_state(index, CELLS.CLOSED)
+
+        search = SOLVER.jump_point_search_steps(grid_obj.cells, grid_obj.cols, start.get_pos(), end.get_pos(),
+                                                on_push=on_push, on_expand=on_expand, stepping=True, stats=stats)
+        return ALGORITHMS.run(search, grid_obj, start, end, stats)
+
+    @staticmethod
+    def lifelong_planning_a_star_steps(grid_obj, planner, start, end, stats=None):
+        """ Repairs the search of an incremental planner (see app/incremental.py) and colors its result. """
+        grid_obj.clear_search()
+
+        def on_expand(index):
+            if index != start.index and index != end.index:
+                grid_obj.set_state(index, CELLS.CLOSED)
+
+        return ALGORITHMS.run(planner.compute_path_steps(on_expand=on_expand, stepping=True, stats=stats), grid_obj, start, end, stats)
+
+    @staticmethod
+    def hierarchical_steps(grid_obj, planner, start, end, smooth=True, stats=None):
+        """ Colors the abstract nodes expanded by a hierarchical planner (see app/hierarchical.py), then its path. """
+        grid_obj.clear_search()
+
+        def on_expand(index):
+            if index != start.index and index != end.index:
+                grid_obj.set_state(index, CELLS.CLOSED)
+
+        search = planner.find_path_steps(start.get_pos(), end.get_pos(), smooth=smooth, on_expand=on_expand, stepping=True, stats=stats)
+        return ALGORITHMS.run(search, grid_obj, start, end, stats)
+
+    @staticmethod
+    def cached_path_steps(grid_obj, cache, start, end, stats=None):
+        """ Colors the path given by a cache of distance fields (see app/field_cache.py), no cell is expanded. """
+        grid_obj.clear_search()
+
+        def search():
+            return cache.path(start.get_pos(), end.get_pos())
+            yield
+
+        return ALGORITHMS.run(search(), grid_obj, start, end, stats)
+
+    @staticmethod
+    def A_star(grid_obj, start, end, visualize=None, **kwargs):
+        return ALGORITHMS.finish(ALGORITHMS.A_star_steps(grid_obj, start, end, **kwargs), visualize=visualize)
+
+    @staticmethod
+    def breadth_first_search(grid_obj, start, end, visualize=None, **kwargs):
+        return ALGORITHMS.finish(ALGORITHMS.breadth_first_search_steps(grid_obj, start, end, **kwargs), visualize=visualize)
+
+    @staticmethod
+    def jump_point_search(grid_obj, start, end, visualize=None, **kwargs):
+        return ALGORITHMS.finish(ALGORITHMS.jump_point_search_steps(grid_obj, start, end, **kwargs), visualize=visualize)
+
+    @staticmethod
+    def lifelong_planning_a_star(grid_obj, planner, start, end, visualize=None, **kwargs):
+        return ALGORITHMS.finish(ALGORITHMS.lifelong_planning_a_star_steps(grid_obj, planner, start, end, **kwargs), visualize=visualize)
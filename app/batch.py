@@ -0,0 +1,199 @@
+# batch.py
+
+"""
+    Batch generation and solving of many mazes, spread over a pool of processes.
+
+    Every task gets its own seed, derived from the seed of the batch and the number of the task,
+    so a batch gives the same mazes whatever the number of processes and the order of the results.
+    A worker sends back a compact BatchResult : the walls packed at one bit per cell and the path
+    as a string of moves, never a lab matrix of strings.
+
+    It is also a command line tool, without pygame, writing one JSON line per maze :
+
+        python -m app.batch --rows 101 --count 1000 --seed 7 --path | gzip > mazes.jsonl.gz
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sys
+import time
+from itertools import islice
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+from app.cells import CELLS
+from app.maze_generator import MAZE_GENERATOR
+from app.solver import SOLVER
+
+class BatchResult(NamedTuple):
+    """
+    Result of one task of a batch.
+
+    :ivar int index: Number of the task in the batch.
+    :ivar int seed: Seed of the maze, MAZE_GENERATOR(height, width, generator, seed) builds it again.
+    :ivar int height: Number of rows.
+    :ivar int width: Number of columns.
+    :ivar bytes cells: Walls packed at one bit per cell (see CELLS.pack_bits), None if not kept.
+    :ivar str moves: Path from the entrance to the exit as moves (see CELLS.path_to_moves), None if not kept.
+    :ivar bool found: Has a path been found?
+    :ivar int cost: Number of moves of the path, -1 if not found.
+    :ivar int expanded: Number of expanded cells.
+    :ivar float generate_time: Generation time, in seconds.
+    :ivar float solve_time: Solving time (link masks included), in seconds.
+    """
+    index: int
+    seed: int
+    height: int
+    width: int
+    cells: Optional[bytes]
+    moves: Optional[str]
+    found: bool
+    cost: int
+    expanded: int
+    generate_time: float
+    solve_time: float
+
+class BATCH:
+    """ This class generates and solves batches of mazes. """
+
+    # largest default chunk of tasks sent to a worker, and tasks given to the pool at once, in chunks per worker (see BATCH.run)
+    MAX_CHUNKSIZE = 256
+    WINDOW_CHUNKS = 4
+
+    @staticmethod
+    def task_seed(seed: int, index: int) -> int:
+        """
+            Returns the seed of a task : a 64 bits hash of the seed of the batch and the number of the task,
+            the same in every process (unlike hash(), which is salted per process for strings).
+        """
+        digest = hashlib.blake2b(f'{seed}:{index}'.encode('ascii'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big')
+
+    @staticmethod
+    def run_task(task: Tuple) -> BatchResult:
+        """
+            Generates and solves one maze, in a worker.
+
+            :param task: (index, seed, height, width, generator, solver, keep_cells, keep_path)
+        """
+        index, seed, height, width, generator, solver, keep_cells, keep_path = task
+
+        begin = time.perf_counter()
+        mg = MAZE_GENERATOR(height, width, generator, seed=seed)
+        cells = mg.create_cells()
+        generated = time.perf_counter()
+
+        options = SOLVER.search_options(solver, cells, width)
+        result = SOLVER.SEARCHES[solver](cells, width, mg.entrance, mg.exit, **options)
+        solved = time.perf_counter()
+
+        return BatchResult(index, seed, height, width,
+                           CELLS.pack_bits(cells) if keep_cells else None,
+                           CELLS.path_to_moves(result.path) if keep_path else None,
+                           result.found, result.cost, result.expanded,
+                           generated - begin, solved - generated)
+
+    @staticmethod
+    def run(count: int, height: int, width: Optional[int] = None, generator: str = 'prim', solver: str = 'a_star',
+            seed: int = 0, processes: Optional[int] = None, chunksize: Optional[int] = None,
+            keep_cells: bool = True, keep_path: bool = True, ordered: bool = True) -> Iterator[BatchResult]:
+        """
+            Generates and solves count mazes over a pool of processes, and yields their results as they come.
+
+            :param count: Number of mazes.
+            :type  count: int
+            :param height: Number of rows of every maze.
+            :type  height: int
+            :param width: Number of columns of every maze (default height).
+            :type  width: int
+            :param generator: Name of the generation algorithm (see MAZE_GENERATOR.ALGORITHMS).
+            :type  generator: str
+            :param solver: Name of the search (see SOLVER.SEARCHES).
+            :type  solver: str
+            :param seed: Seed of the batch, the seed of every task is derived from it (see BATCH.task_seed).
+            :type  seed: int
+            :param processes: Number of worker processes (default os.cpu_count()), 1 runs the batch in this process.
+            :type  processes: int
+            :param chunksize: Tasks sent to a worker at once (default a few chunks per worker, at most MAX_CHUNKSIZE).
+            :type  chunksize: int
+            :param keep_cells: Send back the packed walls of every maze?
+            :type  keep_cells: bool
+            :param keep_path: Send back the path of every maze?
+            :type  keep_path: bool
+            :param ordered: Yield the results in the order of the tasks, instead of as soon as they are done.
+            :type  ordered: bool
+
+            The tasks are given to the pool by windows of a few chunks per worker : the results waiting to be
+            read never exceed a window, so the memory stays the same for any number of mazes.
+        """
+        width = height if width is None else width
+        # checked here, not in the workers, so a wrong name fails at once
+        MAZE_GENERATOR(height, width, generator)
+        if solver not in SOLVER.SEARCHES:
+            raise ValueError(f"Unknown algorithm '{solver}', expected one of {sorted(SOLVER.SEARCHES)}.")
+
+        tasks = ((index, BATCH.task_seed(seed, index), height, width, generator, solver, keep_cells, keep_path)
+                 for index in range(count))
+        processes = min(processes or os.cpu_count() or 1, max(count, 1))
+        if processes == 1:
+            yield from map(BATCH.run_task, tasks)
+            return
+
+        # imported here : a batch run in this process (e.g. from the command line) starts faster without it
+        import multiprocessing
+        if chunksize is None:
+            chunksize = max(1, min(count // (processes * 4), BATCH.MAX_CHUNKSIZE))
+        window = chunksize * processes * BATCH.WINDOW_CHUNKS
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.imap if ordered else pool.imap_unordered
+            for _ in range(0, count, window):
+                yield from results(BATCH.run_task, islice(tasks, window), chunksize)
+
+    @staticmethod
+    def to_json(result: BatchResult, generator: str, solver: str) -> Dict:
+        """ Returns a result as a dict ready for JSON : the packed walls in base64, what was not kept left out. """
+        record = result._asdict()
+        record['generator'] = generator
+        record['solver'] = solver
+        if result.cells is None:
+            del record['cells']
+        else:
+            record['cells'] = base64.b64encode(result.cells).decode('ascii')
+        if result.moves is None:
+            del record['moves']
+        return record
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generates and solves mazes, one JSON line per maze (without any display).")
+    parser.add_argument('--rows', type=int, default=101, help="rows of every maze")
+    parser.add_argument('--cols', type=int, help="columns of every maze (default rows)")
+    parser.add_argument('--count', type=int, default=1, help="number of mazes")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the batch, the same seed gives the same mazes")
+    parser.add_argument('--generator', default='prim', choices=MAZE_GENERATOR.ALGORITHMS, help="generation algorithm")
+    parser.add_argument('--solver', default='a_star', choices=sorted(SOLVER.SEARCHES), help="search algorithm")
+    parser.add_argument('--processes', type=int, default=1, help="worker processes (0 for one per CPU)")
+    parser.add_argument('--unordered', action='store_true', help="write the mazes as soon as they are done")
+    parser.add_argument('--cells', action='store_true', help="add the walls packed at one bit per cell, in base64 (see CELLS.pack_bits)")
+    parser.add_argument('--path', action='store_true', help="add the path as moves (see CELLS.path_to_moves)")
+    parser.add_argument('--output', '-o', help="file to write (default the standard output)")
+    args = parser.parse_args(argv)
+
+    results = BATCH.run(args.count, args.rows, args.cols, generator=args.generator, solver=args.solver, seed=args.seed,
+                        processes=args.processes or None, keep_cells=args.cells, keep_path=args.path,
+                        ordered=not args.unordered)
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for result in results:
+            output.write(json.dumps(BATCH.to_json(result, args.generator, args.solver), separators=(',', ':')))
+            output.write('\n')
+    except BrokenPipeError:
+        # the reader stopped (e.g. | head) : quiet exit, without a second error when stdout is flushed at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == '__main__':
+    main()
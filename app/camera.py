@@ -0,0 +1,125 @@
+# camera.py
+
+"""
+    Pan and zoom of the view on a grid.
+
+    The convention of the Grid is kept : the rows of the grid go along the x axis of the window,
+    its columns along the y axis. The camera only does the arithmetic between pixels and cells,
+    it never draws (see app/renderer.py).
+"""
+
+import math
+from typing import Optional, Tuple
+
+class CAMERA:
+    """
+    A view of width x height pixels on a grid of rows x cols cells.
+
+    :ivar int width: Width of the view, in pixels.
+    :ivar int height: Height of the view, in pixels.
+    :ivar int rows: Number of rows of the grid.
+    :ivar int cols: Number of columns of the grid.
+    :ivar float zoom: Size of a cell, in pixels (below 1 when zoomed out on a big grid).
+    :ivar float row: Row position (fractional) at the left of the view.
+    :ivar float col: Column position (fractional) at the top of the view.
+    """
+
+    MAX_ZOOM = 64.0
+    # cells smaller than this (pixels) are drawn by square blocks of cells : the level of detail
+    MIN_CELL_PIXELS = 4
+    # the view can't be zoomed out further than the whole grid, or than this size when the grid is small
+    MIN_ZOOM = 1 / 64
+
+    def __init__(self, width: int, height: int, rows: int, cols: int):
+        self.width = width
+        self.height = height
+        self.rows = rows
+        self.cols = cols
+        self.zoom = 1.0
+        self.row = 0.0
+        self.col = 0.0
+        self.fit()
+
+    def state(self) -> Tuple[float, float, float]:
+        """ Returns (zoom, row, col) : the view changed when it changed. """
+        return self.zoom, self.row, self.col
+
+    def fit_zoom(self) -> float:
+        """ Returns the zoom showing the whole grid. """
+        return min(self.width / self.rows, self.height / self.cols)
+
+    def fit(self):
+        """ Shows the whole grid, centered. """
+        self.zoom = min(self.fit_zoom(), CAMERA.MAX_ZOOM)
+        self.clamp()
+
+    def clamp(self):
+        """ Keeps the grid on the view : centered along an axis where it is smaller than the view. """
+        view_rows, view_cols = self.width / self.zoom, self.height / self.zoom
+        if view_rows >= self.rows:
+            self.row = (self.rows - view_rows) / 2
+        else:
+            self.row = min(max(self.row, 0.0), self.rows - view_rows)
+        if view_cols >= self.cols:
+            self.col = (self.cols - view_cols) / 2
+        else:
+            self.col = min(max(self.col, 0.0), self.cols - view_cols)
+
+    def pan(self, d_x: float, d_y: float):
+        """ Moves the grid by (d_x, d_y) pixels on the view. """
+        self.row -= d_x / self.zoom
+        self.col -= d_y / self.zoom
+        self.clamp()
+
+    def zoom_at(self, factor: float, pos: Tuple[int, int]):
+        """
+            Zooms by factor, keeping the cell under the pixel pos at the same place.
+
+            :param factor: Zoom factor (above 1 to zoom in).
+            :type  factor: float
+            :param pos: (x, y) pixel position in the view.
+        """
+        zoom = min(max(self.zoom * factor, min(self.fit_zoom(), CAMERA.MIN_ZOOM)), CAMERA.MAX_ZOOM)
+        x, y = pos
+        self.row += x / self.zoom - x / zoom
+        self.col += y / self.zoom - y / zoom
+        self.zoom = zoom
+        self.clamp()
+
+    def cell_at(self, pos: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """ Returns the (row, col) of the cell under the pixel pos, None out of the grid. """
+        x, y = pos
+        row = math.floor(self.row + x / self.zoom)
+        col = math.floor(self.col + y / self.zoom)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row, col
+        return None
+
+    def block(self) -> int:
+        """ Returns the number of cells along a side of a drawn block : 1 unless the cells are smaller than MIN_CELL_PIXELS. """
+        return max(1, math.ceil(CAMERA.MIN_CELL_PIXELS / self.zoom))
+
+    def visible(self) -> Tuple[int, int, int, int]:
+        """
+            Returns (first row, end row, first col, end col) of the cells on the view, clipped to the grid.
+            The first row and col are multiples of the block, so the blocks don't move while panning.
+        """
+        block = self.block()
+        first_row = max(0, math.floor(self.row) // block * block)
+        first_col = max(0, math.floor(self.col) // block * block)
+        end_row = min(self.rows, math.ceil(self.row + self.width / self.zoom))
+        end_col = min(self.cols, math.ceil(self.col + self.height / self.zoom))
+        return first_row, end_row, first_col, end_col
+
+    def to_x(self, row: float) -> int:
+        """ Returns the pixel x of the left edge of a row. """
+        return math.floor((row - self.row) * self.zoom)
+
+    def to_y(self, col: float) -> int:
+        """ Returns the pixel y of the top edge of a column. """
+        return math.floor((col - self.col) * self.zoom)
+
+    def rect(self, row: int, col: int, size: int = 1) -> Tuple[int, int, int, int]:
+        """ Returns the (x, y, width, height) pixels of the block of size x size cells at (row, col). """
+        x, y = self.to_x(row), self.to_y(col)
+        return x, y, self.to_x(row + size) - x, self.to_y(col + size) - y
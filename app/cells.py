@@ -0,0 +1,163 @@
+# cells.py
+
+from typing import List, Tuple
+
+class CELLS:
+    """ State codes of a cell when a grid is stored as a flat buffer (one byte per cell). """
+    EMPTY = 0
+    BARRIER = 1
+    START = 2
+    END = 3
+    OPEN = 4
+    CLOSED = 5
+    PATH = 6
+
+    # bytes.translate table : 'm' (mur) and 'n' (non visité) are walls, 'c' (chemin) is free.
+    LAB_TABLE = bytes.maketrans(b'mnc', bytes([BARRIER, BARRIER, EMPTY]))
+    # bytes.translate table : walls become 'm', everything else 'c'.
+    TO_LAB_TABLE = b'c' * BARRIER + b'm' + b'c' * (255 - BARRIER)
+    # bytes.translate table : removes the marks left by a search (open, closed, path).
+    CLEAR_TABLE = bytes.maketrans(bytes([OPEN, CLOSED, PATH]), bytes([EMPTY, EMPTY, EMPTY]))
+    # bytes.translate table : 1 for a free cell, 0 for a wall.
+    FREE_TABLE = b'\x01' * BARRIER + b'\x00' + b'\x01' * (255 - BARRIER)
+    # bytes.translate tables between cells and the digits of a packed wall bit field.
+    TO_BITS_TABLE = b'0' * BARRIER + b'1' + b'0' * (255 - BARRIER)
+    FROM_BITS_TABLE = bytes.maketrans(b'01', bytes([EMPTY, BARRIER]))
+
+    # Bits of a link mask : the free neighbors of a cell.
+    DOWN, UP, RIGHT, LEFT = 1, 2, 4, 8
+    # Letters of a packed path, one per move.
+    MOVES = {(1, 0): 'd', (-1, 0): 'u', (0, 1): 'r', (0, -1): 'l'}
+
+    @staticmethod
+    def links(cells, cols: int) -> bytearray:
+        """
+            Returns the link mask (DOWN | UP | RIGHT | LEFT) of every free cell, computed in bulk
+            with big integer operations (one byte per cell, so no Python loop over the cells).
+
+            :param cells: Flat buffer of cell states.
+            :param cols: Number of columns.
+            :type  cols: int
+        """
+        size = len(cells)
+        rows = size // cols
+        full = (1 << 8 * size) - 1
+        free = int.from_bytes(bytes(cells).translate(CELLS.FREE_TABLE), 'big')
+        # byte i of (free << 8 * k) is free[i + k]
+        not_last_col = int.from_bytes((b'\x01' * (cols - 1) + b'\x00') * rows, 'big')
+        not_first_col = int.from_bytes((b'\x00' + b'\x01' * (cols - 1)) * rows, 'big')
+
+        down = free & (free << 8 * cols) & full
+        up = free & (free >> 8 * cols)
+        right = free & (free << 8) & not_last_col
+        left = free & (free >> 8) & not_first_col
+        return bytearray((down | up << 1 | right << 2 | left << 3).to_bytes(size, 'big'))
+
+    @staticmethod
+    def update_links(cells, links, cols: int, index: int):
+        """
+            Updates the link masks of a cell and of its four neighbors after it became or stopped being a barrier.
+
+            :param cells: Flat buffer of cell states.
+            :param links: Link masks of the cells (see CELLS.links), updated in place.
+            :param cols: Number of columns.
+            :type  cols: int
+            :param index: Index of the cell in the buffer (row * cols + col).
+            :type  index: int
+        """
+        row, col = divmod(index, cols)
+        free = cells[index] != CELLS.BARRIER
+        mask = 0
+        for bit, back, neighbor, inside in ((CELLS.DOWN, CELLS.UP, index + cols, index + cols < len(cells)),
+                                            (CELLS.UP, CELLS.DOWN, index - cols, row > 0),
+                                            (CELLS.RIGHT, CELLS.LEFT, index + 1, col < cols - 1),
+                                            (CELLS.LEFT, CELLS.RIGHT, index - 1, col > 0)):
+            if not inside:
+                continue
+            if free and cells[neighbor] != CELLS.BARRIER:
+                mask |= bit
+                links[neighbor] |= back
+            else:
+                links[neighbor] &= ~back & 0xF
+        links[index] = mask
+
+    @staticmethod
+    def link_offsets(cols: int) -> List[Tuple[int, ...]]:
+        """ Returns, for every link mask, the index offsets of the linked neighbors (down, up, right, left). """
+        directions = ((CELLS.DOWN, cols), (CELLS.UP, -cols), (CELLS.RIGHT, 1), (CELLS.LEFT, -1))
+        return [tuple(offset for bit, offset in directions if mask & bit) for mask in range(16)]
+
+    @staticmethod
+    def from_lab(lab: List[List[str]]) -> Tuple[bytearray, int, int]:
+        """
+            Returns (cells, rows, cols) from a MAZE_GENERATOR.lab matrix.
+
+            :param lab: Matrix of 'm' / 'c' characters.
+            :type  lab: List[List[str]]
+        """
+        rows = len(lab)
+        cols = len(lab[0]) if rows else 0
+        cells = bytearray(''.join(''.join(row) for row in lab).encode('ascii').translate(CELLS.LAB_TABLE))
+        return cells, rows, cols
+
+    @staticmethod
+    def to_lab(cells, cols: int) -> List[List[str]]:
+        """
+            Returns a MAZE_GENERATOR.lab matrix from a flat buffer of cells.
+
+            :param cells: Flat buffer of cell states.
+            :param cols: Number of columns.
+            :type  cols: int
+        """
+        lab = []
+        for start in range(0, len(cells), cols):
+            lab.append(list(bytes(cells[start:start + cols]).translate(CELLS.TO_LAB_TABLE).decode('ascii')))
+        return lab
+
+    @staticmethod
+    def pack_bits(cells) -> bytes:
+        """
+            Returns the walls of a buffer of cells packed at one bit per cell (first cell in the
+            high bit of the first byte). The marks of a search, the start and the end are dropped.
+
+            :param cells: Flat buffer of cell states.
+        """
+        size = len(cells)
+        if not size:
+            return b''
+        # int(..., 2) and int.to_bytes are linear, no Python loop over the cells
+        bits = int(bytes(cells).translate(CELLS.TO_BITS_TABLE) + b'0' * (-size % 8), 2)
+        return bits.to_bytes((size + 7) // 8, 'big')
+
+    @staticmethod
+    def unpack_bits(packed, size: int) -> bytearray:
+        """
+            Returns the buffer of cells (walls and empty cells) of a bit field made by CELLS.pack_bits.
+
+            :param packed: Bytes returned by CELLS.pack_bits.
+            :param size: Number of cells.
+            :type  size: int
+        """
+        if not size:
+            return bytearray()
+        digits = bin(int.from_bytes(packed, 'big'))[2:].zfill(len(packed) * 8)
+        return bytearray(digits[:size].encode('ascii').translate(CELLS.FROM_BITS_TABLE))
+
+    @staticmethod
+    def path_to_moves(path: List[Tuple[int, int]]) -> str:
+        """ Returns a path of (row, col) positions as a string of moves ('d', 'u', 'r', 'l'). """
+        moves = CELLS.MOVES
+        return ''.join(moves[(row - prev_row, col - prev_col)]
+                       for (prev_row, prev_col), (row, col) in zip(path, path[1:]))
+
+    @staticmethod
+    def moves_to_path(start: Tuple[int, int], moves: str) -> List[Tuple[int, int]]:
+        """ Returns the (row, col) positions of a path from its start and its string of moves. """
+        steps = {letter: step for step, letter in CELLS.MOVES.items()}
+        row, col = start
+        path = [start]
+        for letter in moves:
+            d_row, d_col = steps[letter]
+            row, col = row + d_row, col + d_col
+            path.append((row, col))
+        return path
@@ -10,4 +10,8 @@ class COLORS:
     PURPLE = (128, 0, 128)
     ORANGE = (255, 165, 0)
     GREY = (128, 128, 128)
-    TURQUOISE = (64, 224, 208)
\ No newline at end of file
+    TURQUOISE = (64, 224, 208)
+
+    # Color of each cell state, indexed by the codes of app/cells.py.
+    #          EMPTY, BARRIER, START,  END,       OPEN,  CLOSED, PATH
+    PALETTE = (WHITE, BLACK,   ORANGE, TURQUOISE, GREEN, RED,    PURPLE)
@@ -0,0 +1,282 @@
+# components.py
+
+"""
+    Connected components of the free cells of a maze.
+
+    Two cells are connected when a path of free cells joins them : a search between two cells of
+    different components can't find a path, it is rejected in O(1) without being started.
+    The components are labeled row by row (runs of free cells, joined with a union-find to the
+    overlapping runs of the row above), then kept up to date for each wall edit : opening a cell
+    joins the components around it, walling a cell off may split its component, which is checked
+    by searching from its neighbors in lockstep until they meet, so only the smallest pieces are visited.
+"""
+
+import re
+import threading
+from array import array
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+
+from app.cells import CELLS
+from app.solver import SOLVER
+
+class COMPONENTS:
+    """
+    Connected components of a flat buffer of cells, built on the first query.
+
+    update_cell has to be called after each wall edit (see COMPONENTS.on_wall_changed), once the
+    link masks are up to date. The components of a Grid work on their own copy of the cells instead,
+    in the background worker : the edits are queued by the UI thread (see COMPONENTS.queue_edit)
+    and applied by the next query of COMPONENTS.reachable.
+
+    :ivar cells: Flat buffer of cell states, read (never copied).
+    :ivar int cols: Number of columns.
+    :ivar int rows: Number of rows.
+    :ivar array labels: Label of every cell (array('i')), -1 for a barrier, None until built.
+                        Two free cells are connected when their labels have the same root (see COMPONENTS.find).
+    :ivar list parent: Union-find forest of the labels.
+    :ivar list size: Number of cells of the component of each root label.
+    :ivar int count: Number of components.
+    :ivar deque edits: Wall edits (index, is a barrier) queued for COMPONENTS.reachable.
+    :ivar threading.Lock lock: Held while the edits are applied and a query runs (see COMPONENTS.reachable).
+    """
+
+    FREE_RUN = re.compile(b'[^' + re.escape(bytes([CELLS.BARRIER])) + b']+')
+
+    def __init__(self, cells, cols: int, links=None):
+        self.cells = cells
+        self.cols = cols
+        self.rows = len(cells) // cols
+        self.neighbors = SOLVER.neighbor_function(cells, cols, links)
+        self.labels = None
+        self.parent = []
+        self.size = []
+        self.count = 0
+        self.edits = deque()
+        self.lock = threading.Lock()
+
+    def new_label(self, size: int) -> int:
+        label = len(self.parent)
+        self.parent.append(label)
+        self.size.append(size)
+        self.count += 1
+        return label
+
+    def find(self, label: int) -> int:
+        """ Returns the root of a label (with path halving). """
+        parent = self.parent
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    def union(self, first: int, second: int) -> int:
+        """ Joins the components of two labels and returns the root of the result. """
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return first
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+        self.count -= 1
+        return first
+
+    def build(self):
+        """ Labels every free cell : a run of free cells of a row takes the label of the runs it overlaps in the row above (joined if several), or a new one. """
+        cells, cols = self.cells, self.cols
+        self.labels = labels = array('i', [-1]) * len(cells)
+        self.parent, self.size, self.count = [], [], 0
+        find, size = self.find, self.size
+        above = []
+        for row in range(self.rows):
+            base = row * cols
+            runs = []
+            j = 0
+            for match in COMPONENTS.FREE_RUN.finditer(bytes(cells[base:base + cols])):
+                first, end = match.span()
+                # the runs of the row above are sorted : skip the ones ending before this run
+                while j < len(above) and above[j][1] <= first:
+                    j += 1
+                label = -1
+                k = j
+                while k < len(above) and above[k][0] < end:
+                    other = find(above[k][2])
+                    label = other if label < 0 else self.union(label, other)
+                    k += 1
+                # the last run overlapped may overlap the next run too
+                j = max(j, k - 1)
+                if label < 0:
+                    label = self.new_label(0)
+                size[label] += end - first
+                if end - first == 1:
+                    labels[base + first] = label
+                else:
+                    labels[base + first:base + end] = array('i', [label]) * (end - first)
+                runs.append((first, end, label))
+            above = runs
+
+    def component(self, cell: Tuple[int, int]) -> Optional[int]:
+        """ Returns the root label of the component of a cell, None for a barrier. """
+        if self.labels is None:
+            self.build()
+        label = self.labels[cell[0] * self.cols + cell[1]]
+        return None if label < 0 else self.find(label)
+
+    def connected(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        """
+            Returns True if a search from start can reach end, in O(1) once the components are built.
+            Like the searches, a start on a barrier still goes to its free neighbors.
+        """
+        if start == end:
+            return True
+        target = self.component(end)
+        if target is None:
+            return False
+        source = self.component(start)
+        if source is not None:
+            return source == target
+        index = start[0] * self.cols + start[1]
+        return any(self.find(self.labels[neighbor]) == target
+                   for neighbor in SOLVER.neighbors(self.cells, self.rows, self.cols, index))
+
+    def update_cell(self, row: int, col: int):
+        """
+            Tells the index that a cell became (or stopped being) a barrier.
+
+            :param row: Row position of the cell.
+            :type  row: int
+            :param col: Column position of the cell.
+            :type  col: int
+        """
+        if self.labels is None:
+            return
+        index = row * self.cols + col
+        around = SOLVER.neighbors(self.cells, self.rows, self.cols, index)
+        if self.cells[index] != CELLS.BARRIER:
+            if self.labels[index] >= 0:
+                return
+            label = self.new_label(1)
+            self.labels[index] = label
+            for neighbor in around:
+                self.union(label, self.labels[neighbor])
+        else:
+            label = self.labels[index]
+            if label < 0:
+                return
+            root = self.find(label)
+            self.labels[index] = -1
+            self.size[root] -= 1
+            if not around:
+                self.count -= 1
+            elif len(around) > 1:
+                self.split(root, around)
+
+    def split(self, root: int, starts: List[int]):
+        """
+            Gives a new label to the pieces of a component cut apart by a new wall. A search runs from
+            each cell of starts, one cell each in turn, and the searches that meet are merged : a search
+            running out of cells before the last one has visited a whole piece.
+        """
+        neighbors = self.neighbors
+        # owner : first search that reached each cell, merged : union-find of the searches
+        owner = {cell: i for i, cell in enumerate(starts)}
+        merged = list(range(len(starts)))
+        queues = [deque([cell]) for cell in starts]
+        visited = [[cell] for cell in starts]
+
+        def find(i):
+            while merged[i] != i:
+                i = merged[i]
+            return i
+
+        active = set(range(len(starts)))
+        while len(active) > 1:
+            for i in list(active):
+                if i not in active:
+                    continue
+                queue = queues[i]
+                if not queue:
+                    # a whole piece : it becomes a component of its own
+                    active.discard(i)
+                    piece = visited[i]
+                    label = self.new_label(len(piece))
+                    self.size[root] -= len(piece)
+                    for cell in piece:
+                        self.labels[cell] = label
+                    if len(active) == 1:
+                        break
+                    continue
+                current = queue.popleft()
+                for neighbor in neighbors(current):
+                    other = owner.get(neighbor)
+                    if other is None:
+                        owner[neighbor] = i
+                        queue.append(neighbor)
+                        visited[i].append(neighbor)
+                        continue
+                    other = find(other)
+                    if other != i:
+                        # the two searches are in the same piece : the smaller one joins the larger one
+                        keep, drop = (i, other) if len(visited[i]) >= len(visited[other]) else (other, i)
+                        merged[drop] = keep
+                        queues[keep].extend(queues[drop])
+                        visited[keep].extend(visited[drop])
+                        queues[drop], visited[drop] = deque(), []
+                        active.discard(drop)
+                        i, queue = keep, queues[keep]
+
+    def on_wall_changed(self, index: int):
+        """ Grid wall listener : see COMPONENTS.update_cell. """
+        self.update_cell(*divmod(index, self.cols))
+
+    def queue_edit(self, index: int, barrier: bool):
+        """ Queues a wall edit, applied to the cells of the components by the next COMPONENTS.reachable (any thread). """
+        self.edits.append((index, barrier))
+
+    def apply_edits(self):
+        """ Applies the queued wall edits to the cells of the components, and to the components. """
+        edits, cells = self.edits, self.cells
+        while edits:
+            index, barrier = edits.popleft()
+            cells[index] = CELLS.BARRIER if barrier else CELLS.EMPTY
+            self.update_cell(*divmod(index, self.cols))
+
+    def reachable(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+        """
+            COMPONENTS.connected after the queued edits, for a background search : the first call builds
+            the components, the next ones only apply the edits. One thread at a time.
+        """
+        with self.lock:
+            self.apply_edits()
+            return self.connected(start, end)
+
+    def known_connected(self, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[bool]:
+        """
+            COMPONENTS.connected when it can answer at once (built, no queued edit, no background query running),
+            None otherwise : for the UI thread, which never waits for a build.
+        """
+        if not self.lock.acquire(blocking=False):
+            return None
+        try:
+            if self.labels is None or self.edits:
+                return None
+            return self.connected(start, end)
+        finally:
+            self.lock.release()
+
+    def sort_queries(self, queries: Iterable[Tuple[Tuple[int, int], Tuple[int, int]]]) -> Tuple[List[int], List[int]]:
+        """
+            Sorts (start, end) queries by component, for a batch of searches : the searches of a component
+            run one after the other, on the same part of the maze, and the unreachable queries are left out.
+
+            Returns (indexes of the reachable queries sorted by component, indexes of the unreachable queries).
+        """
+        reachable, unreachable = [], []
+        for i, (start, end) in enumerate(queries):
+            if self.connected(start, end):
+                reachable.append((self.component(end), i))
+            else:
+                unreachable.append(i)
+        reachable.sort()
+        return [i for _, i in reachable], unreachable
@@ -0,0 +1,109 @@
+# field_cache.py
+
+"""
+    Cache of distance fields, for many path queries against the same maze.
+
+    The distance field of a source (see app/wavefront.py) gives the path from this source to any
+    target, and from any target back to it, in O(path length). The cache keeps the fields of the
+    last sources asked for, within a memory budget (least recently used first out), and drops
+    the fields made wrong by a wall edit.
+"""
+
+from collections import OrderedDict
+from typing import Tuple
+
+from app.solver import SearchResult
+from app.wavefront import DistanceField, WAVEFRONT
+
+class FIELD_CACHE:
+    """
+    Distance fields of a maze, by source.
+
+    A field stays valid while the walls don't change : update_cell has to be called after each edit
+    (Grid.wall_listeners does it for a grid, see FIELD_CACHE.on_wall_changed).
+
+    :ivar cells: Flat buffer of cell states, read (never copied) when a field is computed.
+    :ivar int cols: Number of columns.
+    :ivar int max_bytes: Memory budget of the cached fields.
+    :ivar int hits: Queries answered from a cached field.
+    :ivar int misses: Queries that computed a field.
+    """
+
+    def __init__(self, cells, cols: int, max_bytes: int = 256 * 2 ** 20):
+        WAVEFRONT.require_numpy()
+        self.cells = cells
+        self.cols = cols
+        self.rows = len(cells) // cols
+        self.max_bytes = max_bytes
+        self.fields = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def field_bytes(field: DistanceField) -> int:
+        return field.distance.nbytes + field.directions.nbytes
+
+    def field(self, source: Tuple[int, int]) -> DistanceField:
+        """ Returns the distance field of source, from the cache or computed (and cached if it fits the budget). """
+        field = self.fields.get(source)
+        if field is not None:
+            self.fields.move_to_end(source)
+            self.hits += 1
+            return field
+
+        self.misses += 1
+        field = WAVEFRONT.distance_field(self.cells, self.cols, source)
+        size = FIELD_CACHE.field_bytes(field)
+        if size <= self.max_bytes:
+            while self.size + size > self.max_bytes:
+                self.drop(next(iter(self.fields)))
+            self.fields[source] = field
+            self.size += size
+        return field
+
+    def drop(self, source: Tuple[int, int]):
+        self.size -= FIELD_CACHE.field_bytes(self.fields.pop(source))
+
+    def path(self, start: Tuple[int, int], end: Tuple[int, int]) -> SearchResult:
+        """
+            Returns the shortest path from start to end. A cached field of start or of end answers in
+            O(path length) (the grid is undirected, so a field of end gives the path backwards) ;
+            otherwise the field of start is computed and cached.
+        """
+        if start not in self.fields and end in self.fields:
+            field = self.field(end)
+            path = WAVEFRONT.path(field, start)
+            if path is not None:
+                path.reverse()
+        else:
+            field = self.field(start)
+            path = WAVEFRONT.path(field, end)
+        if path is None:
+            return SearchResult(False, [], -1, 0)
+        return SearchResult(True, path, len(path) - 1, 0)
+
+    def update_cell(self, row: int, col: int):
+        """
+            Tells the cache that a cell became (or stopped being) a wall. Only the fields reaching the
+            cell or one of its neighbors are dropped : an edit out of reach of a source doesn't change its field.
+
+            :param row: Row position of the cell.
+            :type  row: int
+            :param col: Column position of the cell.
+            :type  col: int
+        """
+        around = [(row, col)] + [(r, c) for r, c in ((row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1))
+                                 if 0 <= r < self.rows and 0 <= c < self.cols]
+        for source in [source for source, field in self.fields.items()
+                       if any(field.distance[r, c] >= 0 for r, c in around)]:
+            self.drop(source)
+
+    def on_wall_changed(self, index: int):
+        """ Grid wall listener : see FIELD_CACHE.update_cell. """
+        self.update_cell(*divmod(index, self.cols))
+
+    def clear(self):
+        """ Drops every field, e.g. after changing the cells without update_cell. """
+        self.fields.clear()
+        self.size = 0
@@ -0,0 +1,405 @@
+# hierarchical.py
+
+"""
+    Hierarchical planner : HPA* (Hierarchical Path-Finding A*).
+
+    The grid is split into square clusters. Where two clusters touch, every run of free cells
+    facing each other across the border is an entrance, represented by one transition (two by
+    the ends of a wide run) : a pair of cells, the entrance nodes, linked by one move. Inside a
+    cluster, the distances between its entrance nodes are computed once and cached. A query
+    links the start and the end to the nodes of their clusters, searches this small abstract
+    graph with A*, then refines each abstract edge into cells with a search bounded to one cluster.
+
+    A wall edit only drops the cached distances of its cluster (and rebuilds the border it lies
+    on, with the distances of the cluster across). The paths are near optimal : smooth=True
+    removes their detours, then makes them optimal with an A* pruned by their length (see HPA_STAR.refine_steps).
+"""
+
+from collections import deque
+from heapq import heappush, heappop
+from typing import Callable, Dict, Generator, List, Optional, Tuple
+
+from app.cells import CELLS
+from app.solver import INF, SOLVER, Scores, SearchResult
+from app.stats import SearchStats
+
+class HPA_STAR:
+    """
+    HPA* on a flat buffer of cells.
+
+    :ivar cells: Flat buffer of cell states, read (never copied) at each query.
+    :ivar int cols: Number of columns.
+    :ivar links: Link masks of the grid (see SOLVER.neighbor_function), None to read the cells.
+    :ivar int cluster_size: Side of a cluster, in cells.
+    :ivar dict borders: Transitions (cell, cell) of every border, by pair of clusters.
+    :ivar dict inter: Entrance nodes across a border from an entrance node.
+    :ivar dict nodes: Entrance nodes of every cluster.
+    :ivar dict intra: Cached distances {node: {node: distance}} inside every cluster, missing until needed.
+    """
+
+    # a run of transitions wider than this gives two entrances (one at each end) instead of one (in the middle)
+    MAX_ENTRANCE_WIDTH = 6
+
+    def __init__(self, cells, cols: int, cluster_size: int = 16, links=None):
+        if cluster_size < 2:
+            raise ValueError(f"A cluster needs at least 2x2 cells, got {cluster_size}.")
+        self.cells = cells
+        self.links = links
+        self.neighbors = SOLVER.neighbor_function(cells, cols, links)
+        self.cols = cols
+        self.rows = len(cells) // cols
+        self.cluster_size = cluster_size
+        self.cluster_rows = -(-self.rows // cluster_size)
+        self.cluster_cols = -(-cols // cluster_size)
+
+        self.borders = {}
+        self.inter = {}
+        self.nodes = {cluster: set() for cluster in range(self.cluster_rows * self.cluster_cols)}
+        self.intra = {}
+        for cluster in range(self.cluster_rows * self.cluster_cols):
+            for border in self.cluster_borders(cluster):
+                if border[0] == cluster:
+                    self.build_border(*border)
+
+    def cluster_of(self, index: int) -> int:
+        """ Returns the cluster of a cell. """
+        row, col = divmod(index, self.cols)
+        return row // self.cluster_size * self.cluster_cols + col // self.cluster_size
+
+    def bounds(self, cluster: int) -> Tuple[int, int, int, int]:
+        """ Returns (first row, end row, first col, end col) of the cells of a cluster. """
+        size = self.cluster_size
+        cluster_row, cluster_col = divmod(cluster, self.cluster_cols)
+        return (cluster_row * size, min((cluster_row + 1) * size, self.rows),
+                cluster_col * size, min((cluster_col + 1) * size, self.cols))
+
+    def cluster_borders(self, cluster: int) -> List[Tuple[int, int]]:
+        """ Returns the borders (first cluster, second cluster) of a cluster with the clusters below and on its right, above and on its left. """
+        cluster_row, cluster_col = divmod(cluster, self.cluster_cols)
+        borders = []
+        if cluster_row < self.cluster_rows - 1:
+            borders.append((cluster, cluster + self.cluster_cols))
+        if cluster_col < self.cluster_cols - 1:
+            borders.append((cluster, cluster + 1))
+        if cluster_row > 0:
+            borders.append((cluster - self.cluster_cols, cluster))
+        if cluster_col > 0:
+            borders.append((cluster - 1, cluster))
+        return borders
+
+    def transitions(self, first: int, second: int) -> List[Tuple[int, int]]:
+        """ Returns the transitions of the border between a cluster and the cluster below or on its right. """
+        cells, cols, barrier = self.cells, self.cols, CELLS.BARRIER
+        first_row, end_row, first_col, end_col = self.bounds(first)
+        if second == first + self.cluster_cols:
+            # border below : (last row of first, row below) for every column
+            pairs = [((end_row - 1) * cols + col, end_row * cols + col) for col in range(first_col, end_col)]
+        else:
+            # border on the right : (row, last col of first), (row, col on the right) for every row
+            pairs = [(row * cols + end_col - 1, row * cols + end_col) for row in range(first_row, end_row)]
+
+        transitions = []
+        run = []
+        for pair in pairs + [None]:
+            if pair is not None and cells[pair[0]] != barrier and cells[pair[1]] != barrier:
+                run.append(pair)
+                continue
+            if len(run) > HPA_STAR.MAX_ENTRANCE_WIDTH:
+                transitions += [run[0], run[-1]]
+            elif run:
+                transitions.append(run[len(run) // 2])
+            run = []
+        return transitions
+
+    def build_border(self, first: int, second: int):
+        """ (Re)builds the transitions of a border and drops the cached distances of its two clusters. """
+        inter = self.inter
+        for a, b in self.borders.get((first, second), ()):
+            for node, other in ((a, b), (b, a)):
+                inter[node].remove(other)
+                if not inter[node]:
+                    del inter[node]
+        self.borders[(first, second)] = transitions = self.transitions(first, second)
+        for a, b in transitions:
+            inter.setdefault(a, []).append(b)
+            inter.setdefault(b, []).append(a)
+
+        for cluster in (first, second):
+            self.nodes[cluster] = {node for border in self.cluster_borders(cluster)
+                                   for pair in self.borders.get(border, ()) for node in pair
+                                   if self.cluster_of(node) == cluster}
+            self.intra.pop(cluster, None)
+
+    def bounded_bfs(self, source: int, bounds: Tuple[int, int, int, int],
+                    target: Optional[int] = None) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """
+            Breadth First Search from source without leaving the rows and cols of bounds.
+            Returns (distance, came_from) of the reached cells, stops at target when given.
+        """
+        first_row, end_row, first_col, end_col = bounds
+        cols, neighbors = self.cols, self.neighbors
+        distance = {source: 0}
+        came_from = {}
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            if current == target:
+                break
+            step = distance[current] + 1
+            for neighbor in neighbors(current):
+                if neighbor in distance:
+                    continue
+                row, col = divmod(neighbor, cols)
+                if first_row <= row < end_row and first_col <= col < end_col:
+                    distance[neighbor] = step
+                    came_from[neighbor] = current
+                    queue.append(neighbor)
+        return distance, came_from
+
+    def cluster_graph(self, cluster: int) -> Dict[int, Dict[int, int]]:
+        """ Returns the distances between the entrance nodes of a cluster, computed once until an edit drops them. """
+        graph = self.intra.get(cluster)
+        if graph is None:
+            bounds, nodes = self.bounds(cluster), self.nodes[cluster]
+            graph = {}
+            for node in nodes:
+                distance, _ = self.bounded_bfs(node, bounds)
+                graph[node] = {other: distance[other] for other in nodes if other != node and other in distance}
+            self.intra[cluster] = graph
+        return graph
+
+    def build(self):
+        """ Computes the distances inside every cluster now, instead of at the first query crossing it. """
+        for cluster in self.nodes:
+            self.cluster_graph(cluster)
+
+    def update_cell(self, row: int, col: int):
+        """
+            Tells the planner that a cell became (or stopped being) a wall : only its cluster is rebuilt,
+            with the border it lies on (and the cluster across) when it is at the edge of its cluster.
+
+            :param row: Row position of the cell.
+            :type  row: int
+            :param col: Column position of the cell.
+            :type  col: int
+        """
+        cluster = self.cluster_of(row * self.cols + col)
+        self.intra.pop(cluster, None)
+        first_row, end_row, first_col, end_col = self.bounds(cluster)
+        for first, second in self.cluster_borders(cluster):
+            if second == first + self.cluster_cols:
+                on_border = row == (end_row - 1 if first == cluster else first_row)
+            else:
+                on_border = col == (end_col - 1 if first == cluster else first_col)
+            if on_border:
+                self.build_border(first, second)
+
+    def walk(self, came_from: Dict[int, int], cell: int, source: int) -> List[int]:
+        """ Returns the cells from cell back to source (both included) along came_from. """
+        cells = [cell]
+        while cell != source:
+            cell = came_from[cell]
+            cells.append(cell)
+        return cells
+
+    def smooth(self, path: List[int]) -> List[int]:
+        """
+            Shortens a path : removes its loops, then replaces every stretch of two cluster sizes
+            by the shortest path found around it (bounded to the stretch and one cluster size of margin).
+        """
+        path = HPA_STAR.remove_loops(path)
+        size, cols = self.cluster_size, self.cols
+        result = [path[0]]
+        i = 0
+        while i < len(path) - 1:
+            j = min(i + 2 * size, len(path) - 1)
+            rows_cols = [divmod(cell, cols) for cell in path[i:j + 1]]
+            bounds = (max(min(row for row, _ in rows_cols) - size, 0), min(max(row for row, _ in rows_cols) + size + 1, self.rows),
+                      max(min(col for _, col in rows_cols) - size, 0), min(max(col for _, col in rows_cols) + size + 1, self.cols))
+            distance, came_from = self.bounded_bfs(path[i], bounds, path[j])
+            if distance.get(path[j], INF) < j - i:
+                result += self.walk(came_from, path[j], path[i])[-2::-1]
+            else:
+                result += path[i + 1:j + 1]
+            i = j
+        return HPA_STAR.remove_loops(result)
+
+    def refine_steps(self, path: List[int], on_expand: Optional[Callable[[int], None]] = None,
+                     stepping: bool = False, stats: Optional[SearchStats] = None) -> Generator[int, None, Tuple[List[int], int]]:
+        """
+            Exact refinement of a path : A* from its first cell to its last one, where a cell whose estimate
+            (manhattan) isn't shorter than the path is never pushed. The search only ends early on a
+            shorter path, and its open set is empty otherwise : the path was already the shortest one.
+            Its pushes and reopens are added to the ones of stats, if given.
+
+            Returns (the shortest path, number of expanded cells).
+        """
+        source, target = path[0], path[-1]
+        bound = len(path) - 1
+        cols, neighbors = self.cols, self.neighbors
+        end_row, end_col = divmod(target, cols)
+        g_score = Scores()
+        g_score[source] = 0
+        came_from = {}
+        expanded = 0
+        count = 0
+        # ties broken towards the deepest cell (largest g)
+        open_set = [(0, 0, source)]
+        while open_set:
+            _, minus_g, current = heappop(open_set)
+            current_g = -minus_g
+            if current_g > g_score[current]:
+                continue
+            if current == target:
+                path = self.walk(came_from, target, source)[::-1]
+                break
+            expanded += 1
+            score = current_g + 1
+            for neighbor in neighbors(current):
+                if score >= g_score[neighbor]:
+                    continue
+                row, col = divmod(neighbor, cols)
+                estimate = score + abs(row - end_row) + abs(col - end_col)
+                if estimate >= bound:
+                    continue
+                g_score[neighbor] = score
+                came_from[neighbor] = current
+                count += 1
+                heappush(open_set, (estimate, -score, neighbor))
+            if stats is not None:
+                stats.open_size(len(open_set))
+            if on_expand is not None:
+                on_expand(current)
+            if stepping:
+                yield current
+        if stats is not None:
+            # the pushes of a cell after its first one are reopens, like SOLVER.record_pushes
+            stats.pushed += count
+            stats.reopens += count - (len(g_score) - 1)
+        return path, expanded
+
+    @staticmethod
+    def remove_loops(path: List[int]) -> List[int]:
+        """ Returns the path without the loops going back to an already visited cell. """
+        result = []
+        position = {}
+        for cell in path:
+            if cell in position:
+                for dropped in result[position[cell] + 1:]:
+                    del position[dropped]
+                del result[position[cell] + 1:]
+            else:
+                position[cell] = len(result)
+                result.append(cell)
+        return result
+
+    def find_path_steps(self, start: Tuple[int, int], end: Tuple[int, int], smooth: bool = False,
+                        on_expand: Optional[Callable[[int], None]] = None, stepping: bool = False,
+                        stats: Optional[SearchStats] = None) -> Generator[int, None, SearchResult]:
+        """
+            Searches the abstract graph, then refines the abstract path into cells.
+
+            :param start: (row, col) of the start cell.
+            :param end: (row, col) of the end cell.
+            :param smooth: Shorten the path to a shortest one (see HPA_STAR.smooth and HPA_STAR.refine_steps) ?
+            :type  smooth: bool
+            :param on_expand: Called with the index of every expanded abstract node (and cell of the exact refinement).
+            :param stepping: Yield the index of every expanded node, so the search can be resumed step by step.
+            :param stats: Filled with the counters of the search (see app/stats.py) : the pushes of the abstract
+                          search and of the exact refinement, and the cells reached by the searches bounded to a cluster.
+        """
+        cols = self.cols
+        source, target = start[0] * cols + start[1], end[0] * cols + end[1]
+        if source == target:
+            return SearchResult(True, [start], 0, 0)
+        if self.cells[target] == CELLS.BARRIER:
+            # never reached by the other searches
+            return SearchResult(False, [], -1, 0)
+        if self.cells[source] == CELLS.BARRIER:
+            # like the other searches, a start on a barrier still goes to its free neighbors, maybe in another cluster
+            return (yield from SOLVER.bfs_steps(self.cells, cols, start, end, on_expand=on_expand, links=self.links,
+                                                stepping=stepping, stats=stats))
+        source_cluster, target_cluster = self.cluster_of(source), self.cluster_of(target)
+        # the start and the end are linked to the entrance nodes of their clusters
+        start_distance, start_came_from = self.bounded_bfs(source, self.bounds(source_cluster))
+        end_distance, end_came_from = self.bounded_bfs(target, self.bounds(target_cluster))
+        expanded = len(start_distance) + len(end_distance)
+        end_row, end_col = end
+
+        def edges(node):
+            if node == source:
+                out = [(other, start_distance[other]) for other in self.nodes[source_cluster]
+                       if other != source and other in start_distance]
+                if target in start_distance:
+                    out.append((target, start_distance[target]))
+            else:
+                cluster = self.cluster_of(node)
+                out = list(self.cluster_graph(cluster)[node].items())
+                if cluster == target_cluster and node in end_distance:
+                    out.append((target, end_distance[node]))
+            out += [(other, 1) for other in self.inter.get(node, ())]
+            return out
+
+        g_score = Scores()
+        g_score[source] = 0
+        came_from = {}
+        count = 0
+        open_set = [(abs(start[0] - end_row) + abs(start[1] - end_col), 0, count, source)]
+        while open_set:
+            _, current_g, _, current = heappop(open_set)
+            if current_g > g_score[current]:
+                continue
+            if current == target:
+                break
+            expanded += 1
+            for neighbor, cost in edges(current):
+                score = current_g + cost
+                if score >= g_score[neighbor]:
+                    continue
+                g_score[neighbor] = score
+                came_from[neighbor] = current
+                row, col = divmod(neighbor, cols)
+                count += 1
+                heappush(open_set, (score + abs(row - end_row) + abs(col - end_col), score, count, neighbor))
+            if stats is not None:
+                stats.open_size(len(open_set))
+            if on_expand is not None:
+                on_expand(current)
+            if stepping:
+                yield current
+        else:
+            if stats is not None:
+                SOLVER.record_pushes(stats, count, g_score)
+                stats.pushed += len(start_distance) + len(end_distance)
+            return SearchResult(False, [], -1, expanded)
+        if stats is not None:
+            SOLVER.record_pushes(stats, count, g_score)
+            stats.pushed += len(start_distance) + len(end_distance)
+
+        # refinement : every abstract edge becomes cells
+        abstract = self.walk(came_from, target, source)[::-1]
+        path = [source]
+        for a, b in zip(abstract, abstract[1:]):
+            if self.cluster_of(a) != self.cluster_of(b):
+                # one move across a border
+                path.append(b)
+            elif a == source:
+                path += self.walk(start_came_from, b, source)[-2::-1]
+            elif b == target:
+                path += self.walk(end_came_from, a, target)[1:]
+            else:
+                distance, local_came_from = self.bounded_bfs(a, self.bounds(self.cluster_of(a)), b)
+                expanded += len(distance)
+                if stats is not None:
+                    stats.pushed += len(distance)
+                path += self.walk(local_came_from, b, a)[-2::-1]
+
+        if smooth:
+            path, refined = yield from self.refine_steps(self.smooth(path), on_expand, stepping, stats)
+            expanded += refined
+        return SearchResult(True, [divmod(index, cols) for index in path], len(path) - 1, expanded)
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int], smooth: bool = False,
+                  on_expand: Optional[Callable[[int], None]] = None, stats: Optional[SearchStats] = None) -> SearchResult:
+        """ Query run to the end, see HPA_STAR.find_path_steps. """
+        return SOLVER.finish(self.find_path_steps(start, end, smooth, on_expand, stats=stats), stats)
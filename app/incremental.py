@@ -0,0 +1,171 @@
+# incremental.py
+
+"""
+    Incremental planner : Lifelong Planning A* (LPA*).
+
+    The planner keeps its g / rhs scores and its open set between two runs. When a cell changes,
+    only this cell and its neighbors are made inconsistent again, and the next compute_path()
+    repairs the part of the search that depends on them instead of starting from scratch.
+"""
+
+from heapq import heappush, heappop
+from typing import Callable, Generator, Optional, Tuple
+
+from app.cells import CELLS
+from app.solver import HEURISTICS, INF, SOLVER, Scores, SearchResult
+from app.stats import SearchStats
+
+class LPA_STAR:
+    """
+    Lifelong Planning A* on a flat buffer of cells, with a fixed start and end.
+
+    :ivar cells: Flat buffer of cell states, read (never copied) at each run.
+    :ivar int cols: Number of columns.
+    :ivar tuple start: (row, col) of the start cell.
+    :ivar tuple end: (row, col) of the end cell.
+    :ivar neighbors: Free neighbors of a cell, read from the link masks of the grid when given (see SOLVER.neighbor_function).
+    :ivar set pushed: Cells pushed by the running repair, None unless it is measured (see LPA_STAR.compute_path_steps).
+    """
+
+    def __init__(self, cells, cols: int, start: Tuple[int, int], end: Tuple[int, int],
+                 heuristic: Callable[[int, int, int, int], float] = HEURISTICS.manhattan, links=None):
+        self.cells = cells
+        self.neighbors = SOLVER.neighbor_function(cells, cols, links)
+        self.cols = cols
+        self.rows = len(cells) // cols
+        self.start = start
+        self.end = end
+        self.heuristic = heuristic
+        self.source = start[0] * cols + start[1]
+        self.target = end[0] * cols + end[1]
+
+        self.g = Scores()
+        self.rhs = Scores()
+        self.rhs[self.source] = 0
+        # open set with lazy deletion : keys holds the current key of every queued cell
+        self.open_set = []
+        self.keys = {}
+        self.count = 0
+        self.pushed = None
+        self.push(self.source)
+
+    def key(self, index: int) -> Tuple[float, float]:
+        """ Returns the priority of a cell. """
+        best = min(self.g[index], self.rhs[index])
+        row, col = divmod(index, self.cols)
+        return best + self.heuristic(row, col, self.end[0], self.end[1]), best
+
+    def push(self, index: int):
+        key = self.key(index)
+        self.keys[index] = key
+        self.count += 1
+        if self.pushed is not None:
+            self.pushed.add(index)
+        heappush(self.open_set, (key, self.count, index))
+
+    def top_key(self) -> Tuple[float, float]:
+        """ Returns the smallest key of the open set, after dropping its outdated entries. """
+        open_set, keys = self.open_set, self.keys
+        while open_set and keys.get(open_set[0][2]) != open_set[0][0]:
+            heappop(open_set)
+        return open_set[0][0] if open_set else (INF, INF)
+
+    def adjacent(self, index: int):
+        """ Returns every cell next to index, walls included. """
+        row, col = divmod(index, self.cols)
+        if row < self.rows - 1:
+            yield index + self.cols
+        if row > 0:
+            yield index - self.cols
+        if col < self.cols - 1:
+            yield index + 1
+        if col > 0:
+            yield index - 1
+
+    def update_vertex(self, index: int):
+        """ Recomputes rhs of a cell and puts it in (or out of) the open set. """
+        if index != self.source:
+            if self.cells[index] == CELLS.BARRIER:
+                rhs = INF
+            else:
+                g = self.g
+                rhs = min([g[neighbor] for neighbor in self.neighbors(index)], default=INF)
+                rhs += 1
+            if rhs == INF:
+                self.rhs.pop(index, None)
+            else:
+                self.rhs[index] = rhs
+
+        if self.g[index] != self.rhs[index]:
+            self.push(index)
+        else:
+            self.keys.pop(index, None)
+
+    def update_cell(self, row: int, col: int):
+        """
+            Tells the planner that a cell became (or stopped being) a wall.
+
+            :param row: Row position of the cell.
+            :type  row: int
+            :param col: Column position of the cell.
+            :type  col: int
+        """
+        index = row * self.cols + col
+        self.update_vertex(index)
+        for neighbor in self.adjacent(index):
+            self.update_vertex(neighbor)
+
+    def compute_path_steps(self, on_expand: Optional[Callable[[int], None]] = None,
+                           stepping: bool = False, stats: Optional[SearchStats] = None) -> Generator[int, None, SearchResult]:
+        """
+            Repairs the search after the last changes and returns the current shortest path.
+            The planner stays consistent between two steps, a stopped repair is resumed by the next one.
+
+            :param on_expand: Called with the index of every expanded cell.
+            :param stepping: Yield the index of every expanded cell, so the repair can be resumed step by step.
+            :param stats: Filled with the counters of the repair (see app/stats.py) : a push of a cell already pushed by it is a reopen.
+        """
+        g, rhs, target = self.g, self.rhs, self.target
+        expanded = 0
+        if stats is not None:
+            self.pushed, first_count = set(), self.count
+
+        while self.top_key() < self.key(target) or rhs[target] != g[target]:
+            index = heappop(self.open_set)[2]
+            del self.keys[index]
+            expanded += 1
+
+            if g[index] > rhs[index]:
+                g[index] = rhs[index]
+            else:
+                g.pop(index, None)
+                self.update_vertex(index)
+            for neighbor in self.adjacent(index):
+                self.update_vertex(neighbor)
+
+            if stats is not None:
+                stats.open_size(len(self.keys))
+            if on_expand is not None:
+                on_expand(index)
+            if stepping:
+                yield index
+
+        if stats is not None:
+            stats.pushed = self.count - first_count
+            stats.reopens = stats.pushed - len(self.pushed)
+            self.pushed = None
+        if g[target] == INF:
+            return SearchResult(False, [], -1, expanded)
+
+        # walking back from the end along decreasing g scores
+        path = [target]
+        current = target
+        while current != self.source:
+            current = min(self.neighbors(current), key=g.__getitem__)
+            path.append(current)
+        path.reverse()
+        return SearchResult(True, [divmod(index, self.cols) for index in path], len(path) - 1, expanded)
+
+    def compute_path(self, on_expand: Optional[Callable[[int], None]] = None, stats: Optional[SearchStats] = None) -> SearchResult:
+        """ Repair run to the end, see LPA_STAR.compute_path_steps. """
+        return SOLVER.finish(self.compute_path_steps(on_expand, stats=stats), stats)
@@ -0,0 +1,377 @@
+# junctions.py
+
+"""
+    Dead-end filling and corridor compression : a junction graph of the maze.
+
+    A perfect maze is mostly corridors one cell wide, and dead ends. The preprocessing runs in
+    linear time :
+
+    - dead-end filling : the cells with one free neighbor are removed, and the neighbors left with
+      one free neighbor after them, until none is left. A removed cell remembers the neighbor it was
+      attached to (toward), so the removed cells form trees hanging on the cells kept (the core),
+      or whole trees when a part of the maze has no loop (a perfect maze is removed entirely) ;
+    - corridor compression : the cells of the core with two neighbors in the core are chained into
+      corridors, weighted edges between the other cells of the core, the junctions.
+
+    A query climbs from the start and the end along toward (the unique path inside a tree), then
+    searches the junction graph only, and expands the corridors back into cells at the end.
+
+    A wall edit marks the graph out of date (see JUNCTION_GRAPH.update_cell), and the next query
+    builds it again : a query never reads all the cells. A Grid keeps one on its own copy of the cells,
+    searched and rebuilt in the background worker (see JUNCTION_GRAPH.search_steps) : the UI thread
+    only queues the wall edits.
+"""
+
+import re
+import threading
+import time
+from array import array
+from collections import deque
+from heapq import heappush, heappop
+from typing import Callable, Generator, List, Optional, Tuple
+
+from app.cells import CELLS
+from app.solver import HEURISTICS, SOLVER, Scores, SearchResult
+from app.stats import SearchStats
+
+class JUNCTION_GRAPH:
+    """
+    Junction graph of a flat buffer of cells, built on the first query and again after a wall edit.
+
+    update_cell has to be called after each wall edit (see JUNCTION_GRAPH.on_wall_changed), or the
+    edits queued (see JUNCTION_GRAPH.queue_edit) when the graph works on a copy of the cells.
+
+    :ivar cells: Flat buffer of cell states, read (never copied).
+    :ivar source: Buffer the cells are a copy of (e.g. the cells of a Grid), kept up to date by the queued edits, None if not a copy.
+    :ivar int cols: Number of columns.
+    :ivar int rows: Number of rows.
+    :ivar array toward: Neighbor every removed cell hangs on, JUNCTION_GRAPH.ROOT for the last cell of a tree, JUNCTION_GRAPH.CORE for the other cells.
+    :ivar dict adjacency: Edges of every junction : (junction, length, edge) tuples.
+    :ivar list edges: (first junction, last junction, length) of every corridor.
+    :ivar array corridors: Inner cells of every corridor, in order from its first junction, one corridor after the other.
+    :ivar array offsets: Position of the inner cells of every corridor in corridors (array('i')).
+    :ivar array edge_of: Corridor of every cell (array('i')), -1 for a cell which isn't inside one (a junction, a removed cell, a barrier).
+    :ivar array distance: Distance of every inner cell of a corridor from its first junction (array('i')).
+    :ivar bool valid: Has the graph been built, and not dropped by an edit since (see JUNCTION_GRAPH.update_cell) ?
+    :ivar deque edits: Wall edits (index, is a barrier) queued for JUNCTION_GRAPH.search_steps.
+    :ivar threading.Lock lock: Held while the edits are applied and a search runs (see JUNCTION_GRAPH.search_steps).
+    """
+
+    # toward of a cell kept in the core (or of a barrier), toward of the last cell of a removed tree
+    CORE = -2
+    ROOT = -1
+    # number of free neighbors of a link mask
+    DEGREE_TABLE = bytes(bin(mask).count('1') for mask in range(256))
+    DEAD_END = re.compile(b'[\\x00\\x01]')
+    KEPT = re.compile(b'\\x01')
+
+    def __init__(self, cells, cols: int, links=None, source=None):
+        self.cells = cells
+        self.source = source
+        self.cols = cols
+        self.rows = len(cells) // cols
+        self.links = links
+        self.valid = False
+        self.edits = deque()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def walls(cells) -> bytes:
+        """ Returns the walls of the cells, one byte per cell (see CELLS.FREE_TABLE) : the marks of a search are left out. """
+        return bytes(cells).translate(CELLS.FREE_TABLE)
+
+    def belongs(self, cells, cols: int) -> bool:
+        """
+            Is the graph the one of these cells ? In O(1) for its own cells or their source, the walls of
+            any other buffer are compared (in O(N)).
+        """
+        if cols != self.cols or len(cells) != len(self.cells):
+            return False
+        if cells is self.cells or cells is self.source:
+            return True
+        return JUNCTION_GRAPH.walls(cells) == JUNCTION_GRAPH.walls(self.cells)
+
+    def build(self):
+        """ Fills the dead ends, then compresses the corridors of the core, in one linear pass each. """
+        cells, cols = self.cells, self.cols
+        size = len(cells)
+        links = self.links if self.links is not None else CELLS.links(cells, cols)
+        offsets = CELLS.link_offsets(cols)
+        degree = bytearray(bytes(links).translate(JUNCTION_GRAPH.DEGREE_TABLE))
+        # kept : 1 for a free cell not removed (yet), the core once the dead ends are filled
+        kept = bytearray(bytes(cells).translate(CELLS.FREE_TABLE))
+        toward = array('i', [JUNCTION_GRAPH.CORE]) * size
+
+        # dead-end filling : a removed cell hangs on its last neighbor kept
+        stack = array('i', (match.start() for match in JUNCTION_GRAPH.DEAD_END.finditer(degree) if kept[match.start()]))
+        pop, push = stack.pop, stack.append
+        while stack:
+            index = pop()
+            if not kept[index]:
+                continue
+            kept[index] = 0
+            toward[index] = JUNCTION_GRAPH.ROOT
+            for offset in offsets[links[index]]:
+                neighbor = index + offset
+                if kept[neighbor]:
+                    toward[index] = neighbor
+                    degree[neighbor] -= 1
+                    if degree[neighbor] <= 1:
+                        push(neighbor)
+                    break
+
+        # corridor compression : the junctions are the cells of the core with a core degree other than 2
+        self.toward = toward
+        self.adjacency = {match.start(): [] for match in JUNCTION_GRAPH.KEPT.finditer(kept) if degree[match.start()] != 2}
+        self.edges = []
+        self.corridors = array('i')
+        self.offsets = array('i')
+        self.edge_of = edge_of = array('i', [-1]) * size
+        self.distance = distance = array('i', [0]) * size
+
+        def core_neighbors(index):
+            return [index + offset for offset in offsets[links[index]] if kept[index + offset]]
+
+        def follow(junction, first):
+            """ Walks a corridor from a junction through its neighbor first, up to the next junction. """
+            edge = len(self.edges)
+            self.offsets.append(len(self.corridors))
+            previous, current, length = junction, first, 1
+            adjacency, append = self.adjacency, self.corridors.append
+            while current not in adjacency:
+                append(current)
+                edge_of[current] = edge
+                distance[current] = length
+                # an inner cell has two neighbors in the core : the one it wasn't entered from
+                for offset in offsets[links[current]]:
+                    neighbor = current + offset
+                    if kept[neighbor] and neighbor != previous:
+                        break
+                previous, current = current, neighbor
+                length += 1
+            self.edges.append((junction, current, length))
+            self.adjacency[junction].append((current, length, edge))
+            self.adjacency[current].append((junction, length, edge))
+
+        for junction in list(self.adjacency):
+            for first in core_neighbors(junction):
+                # every corridor is walked once, from one of its ends
+                if edge_of[first] >= 0 or (first in self.adjacency and first < junction):
+                    continue
+                if first in self.adjacency:
+                    self.adjacency[junction].append((first, 1, len(self.edges)))
+                    self.adjacency[first].append((junction, 1, len(self.edges)))
+                    self.offsets.append(len(self.corridors))
+                    self.edges.append((junction, first, 1))
+                else:
+                    follow(junction, first)
+
+        # loops without any junction : one of their cells becomes one
+        for match in JUNCTION_GRAPH.KEPT.finditer(kept):
+            index = match.start()
+            if index not in self.adjacency and edge_of[index] < 0:
+                self.adjacency[index] = []
+                follow(index, core_neighbors(index)[0])
+        self.valid = True
+
+    def update_cell(self, row: int, col: int):
+        """ Tells the graph that a cell became (or stopped being) a barrier : it is built again on the next query. """
+        self.valid = False
+
+    def on_wall_changed(self, index: int):
+        """ Grid wall listener : see JUNCTION_GRAPH.update_cell. """
+        self.update_cell(*divmod(index, self.cols))
+
+    def queue_edit(self, index: int, barrier: bool):
+        """ Queues a wall edit, applied to the cells of the graph by the next JUNCTION_GRAPH.search_steps (any thread). """
+        self.edits.append((index, barrier))
+
+    def apply_edits(self):
+        """ Applies the queued wall edits to the cells of the graph : it is built again by the next query if there were any. """
+        edits, cells = self.edits, self.cells
+        while edits:
+            index, barrier = edits.popleft()
+            cells[index] = CELLS.BARRIER if barrier else CELLS.EMPTY
+            self.update_cell(*divmod(index, self.cols))
+
+    def search_steps(self, cells, cols: int, start: Tuple[int, int], end: Tuple[int, int],
+                     on_push: Optional[Callable[[int], None]] = None, on_expand: Optional[Callable[[int], None]] = None,
+                     stepping: bool = False, stats: Optional[SearchStats] = None,
+                     heuristic: Callable[[int, int, int, int], float] = HEURISTICS.manhattan) -> Generator[int, None, SearchResult]:
+        """
+            JUNCTION_GRAPH.find_path_steps with the arguments of the SOLVER searches, for a background search
+            (see WORKER.search) : the queued edits are applied first, and the graph built again if needed,
+            in the worker. One thread at a time.
+
+            :param cells: Snapshot of the cells of the maze, which the graph has its own copy of.
+            :param cols: Number of columns.
+            :type  cols: int
+            :param on_push: Unused : the junctions expanded are only logged by on_expand.
+        """
+        with self.lock:
+            self.apply_edits()
+            return (yield from self.find_path_steps(start, end, heuristic, on_expand, stepping, stats))
+
+    def cell_at(self, edge: int, distance: int) -> int:
+        """ Returns the cell at a distance from the first junction of a corridor. """
+        first, last, length = self.edges[edge]
+        if distance == 0:
+            return first
+        if distance == length:
+            return last
+        return self.corridors[self.offsets[edge] + distance - 1]
+
+    def climb(self, source: int, target: int) -> Tuple[List[int], List[int], bool]:
+        """
+            Climbs from source and from target along toward, one step each in turn, until they meet
+            or both reach the core. Returns (cells from source, cells from target, met) : when they met,
+            both lists end on the meeting cell.
+        """
+        seen_source, seen_target = {source: 0}, {target: 0}
+        from_source, from_target = [source], [target]
+        toward = self.toward
+        while True:
+            if from_source[-1] in seen_target:
+                meeting = from_source[-1]
+                return from_source, from_target[:seen_target[meeting] + 1], True
+            if from_target[-1] in seen_source:
+                meeting = from_target[-1]
+                return from_source[:seen_source[meeting] + 1], from_target, True
+            moved = False
+            for cells, seen in ((from_source, seen_source), (from_target, seen_target)):
+                up = toward[cells[-1]]
+                if up >= 0:
+                    seen[up] = len(cells)
+                    cells.append(up)
+                    moved = True
+            if not moved:
+                return from_source, from_target, False
+
+    def find_path_steps(self, start: Tuple[int, int], end: Tuple[int, int],
+                        heuristic: Callable[[int, int, int, int], float] = HEURISTICS.manhattan,
+                        on_expand: Optional[Callable[[int], None]] = None, stepping: bool = False,
+                        stats: Optional[SearchStats] = None) -> Generator[int, None, SearchResult]:
+        """
+            Climbs from the start and the end to the core, then searches the junction graph (A*, or
+            Dijkstra with HEURISTICS.zero), then expands the corridors of the path into cells.
+
+            :param start: (row, col) of the start cell.
+            :param end: (row, col) of the end cell.
+            :param heuristic: Estimation of the distance (row, col, end_row, end_col), see HEURISTICS.
+            :param on_expand: Called with the index of every expanded junction.
+            :param stepping: Yield the index of every expanded junction, so the search can be resumed step by step.
+            :param stats: Filled with the counters of the search (see app/stats.py), the build is timed as the 'neighbors' phase.
+        """
+        cols = self.cols
+        source, target = start[0] * cols + start[1], end[0] * cols + end[1]
+        if source == target:
+            return SearchResult(True, [start], 0, 0)
+        if self.cells[target] == CELLS.BARRIER:
+            return SearchResult(False, [], -1, 0)
+        if self.cells[source] == CELLS.BARRIER:
+            # like the searches, a start on a barrier still goes to its free neighbors : out of the graph
+            return (yield from SOLVER.bfs_steps(self.cells, cols, start, end, on_expand=on_expand, links=self.links,
+                                                stepping=stepping, stats=stats))
+        if not self.valid:
+            begin = time.perf_counter()
+            self.build()
+            if stats is not None:
+                stats.add_time('neighbors', begin)
+
+        from_source, from_target, met = self.climb(source, target)
+        if met:
+            path = from_source + from_target[-2::-1]
+            return SearchResult(True, [divmod(index, cols) for index in path], len(path) - 1, 0)
+        first, last = from_source[-1], from_target[-1]
+        if self.toward[first] == JUNCTION_GRAPH.ROOT or self.toward[last] == JUNCTION_GRAPH.ROOT:
+            # a whole tree climbed without meeting : not the same part of the maze
+            return SearchResult(False, [], -1, 0)
+
+        # the ends in the core, in the middle of a corridor, are linked to the junctions of their corridor
+        edge_of, distance = self.edge_of, self.distance
+        extra = {}
+        for index in (first, last):
+            edge = edge_of[index]
+            if edge >= 0:
+                first_junction, last_junction, length = self.edges[edge]
+                extra[index] = [(first_junction, distance[index], edge), (last_junction, length - distance[index], edge)]
+        if edge_of[first] >= 0 and edge_of[first] == edge_of[last]:
+            extra[first].append((last, abs(distance[first] - distance[last]), edge_of[first]))
+        if last in extra:
+            for junction, length, edge in extra[last]:
+                extra.setdefault(junction, []).append((last, length, edge))
+
+        end_row, end_col = divmod(last, cols)
+        g_score = Scores()
+        g_score[first] = 0
+        came_from = {}
+        count = 0
+        expanded = 0
+        open_set = [(0, 0, count, first)]
+        while open_set:
+            _, current_g, _, current = heappop(open_set)
+            if current_g > g_score[current]:
+                continue
+            if current == last:
+                break
+            expanded += 1
+            for neighbor, length, edge in self.adjacency.get(current, []) + extra.get(current, []):
+                score = current_g + length
+                if score >= g_score[neighbor]:
+                    continue
+                g_score[neighbor] = score
+                came_from[neighbor] = (current, edge)
+                row, col = divmod(neighbor, cols)
+                count += 1
+                heappush(open_set, (score + heuristic(row, col, end_row, end_col), score, count, neighbor))
+            if stats is not None:
+                stats.open_size(len(open_set))
+            if on_expand is not None:
+                on_expand(current)
+            if stepping:
+                yield current
+        else:
+            if stats is not None:
+                SOLVER.record_pushes(stats, count, g_score)
+            return SearchResult(False, [], -1, expanded)
+        if stats is not None:
+            SOLVER.record_pushes(stats, count, g_score)
+
+        # the junctions back into cells
+        steps = []
+        current = last
+        while current != first:
+            previous, edge = came_from[current]
+            steps.append((previous, current, edge))
+            current = previous
+        path = from_source[:]
+        for previous, current, edge in reversed(steps):
+            path += self.corridor(previous, current, edge)[1:]
+        path += from_target[-2::-1]
+        return SearchResult(True, [divmod(index, cols) for index in path], len(path) - 1, expanded)
+
+    def corridor(self, begin: int, end: int, edge: int) -> List[int]:
+        """ Returns the cells of a corridor from the cell begin to the cell end (both on it, both included). """
+        first_junction, last_junction, length = self.edges[edge]
+
+        def distance(index):
+            if self.edge_of[index] == edge:
+                return self.distance[index]
+            return 0 if index == first_junction else length
+
+        from_distance, to_distance = distance(begin), distance(end)
+        # a loop starts and ends on the same junction : the direction is the other end
+        if begin == end == first_junction:
+            from_distance, to_distance = 0, length
+        elif first_junction == last_junction and begin == first_junction:
+            from_distance = 0 if to_distance <= length // 2 else length
+        elif first_junction == last_junction and end == first_junction:
+            to_distance = 0 if from_distance <= length // 2 else length
+        step = 1 if to_distance >= from_distance else -1
+        return [self.cell_at(edge, distance) for distance in range(from_distance, to_distance + step, step)]
+
+    def find_path(self, start: Tuple[int, int], end: Tuple[int, int],
+                  heuristic: Callable[[int, int, int, int], float] = HEURISTICS.manhattan,
+                  stats: Optional[SearchStats] = None) -> SearchResult:
+        """ Query run to the end, see JUNCTION_GRAPH.find_path_steps. """
+        return SOLVER.finish(self.find_path_steps(start, end, heuristic, stats=stats), stats)
@@ -0,0 +1,189 @@
+# maze_file.py
+
+"""
+    Compact binary maze files, loaded through mmap.
+
+    A file is a 64 bytes header followed by the cells, row by row :
+
+        magic 'AMZF' | version (u8) | encoding (u8) | flags (u16) | rows (u64) | cols (u64)
+        | seed (u64) | start row, start col, end row, end col (u64 each)      (little endian)
+
+    With the BYTES encoding every cell is one byte (a CELLS state code), the loaded cells are a
+    memoryview on the mapped file : nothing is read or converted before a cell is used, so even a
+    huge maze opens at once. The BITS encoding packs the walls at one bit per cell (see
+    CELLS.pack_bits), eight times smaller, and is unpacked into a bytearray when loaded.
+"""
+
+import mmap
+import struct
+from typing import Iterator, Optional, Tuple
+
+from app.cells import CELLS
+from app.maze_generator import MAZE_GENERATOR
+
+class MazeFile:
+    """
+    A loaded maze file. Close it (or use it in a with block) to release the mapping.
+
+    :ivar cells: Flat buffer of cell states : a memoryview on the file (BYTES encoding) or a bytearray (BITS encoding).
+    :ivar int rows: Number of rows.
+    :ivar int cols: Number of columns.
+    :ivar int seed: Seed of the maze, None if unknown.
+    :ivar tuple start: (row, col) of the start cell.
+    :ivar tuple end: (row, col) of the end cell.
+    :ivar int encoding: MAZE_FILE.BYTES or MAZE_FILE.BITS.
+    """
+
+    def __init__(self, mapping: mmap.mmap, cells, rows: int, cols: int, seed: Optional[int],
+                 start: Tuple[int, int], end: Tuple[int, int], encoding: int):
+        self.mapping = mapping
+        self.cells = cells
+        self.rows = rows
+        self.cols = cols
+        self.seed = seed
+        self.start = start
+        self.end = end
+        self.encoding = encoding
+
+    def close(self):
+        """ Releases the cells and the mapping (the cells of a BYTES file can't be used anymore). """
+        if isinstance(self.cells, memoryview):
+            self.cells.release()
+        self.mapping.close()
+
+    def __enter__(self) -> 'MazeFile':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class MAZE_FILE:
+    """ This class saves and loads maze files. """
+
+    MAGIC = b'AMZF'
+    VERSION = 1
+    # encodings of the cells
+    BYTES = 0
+    BITS = 1
+    # flags
+    HAS_SEED = 1
+
+    HEADER = struct.Struct('<4sBBH7Q')
+
+    @staticmethod
+    def header(rows: int, cols: int, seed: Optional[int] = None, start: Tuple[int, int] = (0, 1),
+               end: Optional[Tuple[int, int]] = None, bits: bool = False) -> bytes:
+        """ Returns the header of a maze file, the end defaults to (rows - 1, cols - 2) like MAZE_GENERATOR.exit. """
+        if end is None:
+            end = (rows - 1, cols - 2)
+        if seed is not None and not 0 <= seed < 1 << 64:
+            raise ValueError(f"The seed of a maze file is an unsigned 64 bits integer, got {seed}.")
+        return MAZE_FILE.HEADER.pack(MAZE_FILE.MAGIC, MAZE_FILE.VERSION, MAZE_FILE.BITS if bits else MAZE_FILE.BYTES,
+                                     MAZE_FILE.HAS_SEED if seed is not None else 0,
+                                     rows, cols, seed or 0, start[0], start[1], end[0], end[1])
+
+    @staticmethod
+    def save(path: str, cells, rows: int, cols: int, seed: Optional[int] = None, start: Tuple[int, int] = (0, 1),
+             end: Optional[Tuple[int, int]] = None, bits: bool = False):
+        """
+            Saves a flat buffer of cells. With bits=True only the walls are kept (one bit per cell).
+
+            :param path: Path of the file.
+            :type  path: str
+            :param cells: Flat buffer of cell states, row by row.
+            :param rows: Number of rows.
+            :type  rows: int
+            :param cols: Number of columns.
+            :type  cols: int
+            :param seed: Seed of the maze, if it is known.
+            :type  seed: int
+            :param start: (row, col) of the start cell.
+            :param end: (row, col) of the end cell (default (rows - 1, cols - 2)).
+            :param bits: Pack the cells at one bit per cell?
+            :type  bits: bool
+        """
+        if len(cells) != rows * cols:
+            raise ValueError(f"{len(cells)} cells given for a {rows}x{cols} maze.")
+        with open(path, 'wb') as file:
+            file.write(MAZE_FILE.header(rows, cols, seed, start, end, bits))
+            file.write(CELLS.pack_bits(cells) if bits else cells)
+
+    @staticmethod
+    def save_rows(path: str, lines: Iterator, rows: int, cols: int, seed: Optional[int] = None,
+                  start: Tuple[int, int] = (0, 1), end: Optional[Tuple[int, int]] = None, bits: bool = False):
+        """
+            Saves a maze given row by row (e.g. MAZE_GENERATOR.stream_rows) : only eight rows are kept in memory.
+            Same parameters as MAZE_FILE.save, with lines the iterator of the rows of cells.
+        """
+        count = 0
+        with open(path, 'wb') as file:
+            file.write(MAZE_FILE.header(rows, cols, seed, start, end, bits))
+            # eight rows are a whole number of bytes once packed
+            band = bytearray()
+            for line in lines:
+                if len(line) != cols:
+                    raise ValueError(f"Row {count} has {len(line)} cells, {cols} expected.")
+                count += 1
+                if not bits:
+                    file.write(line)
+                    continue
+                band += line
+                if count % 8 == 0:
+                    file.write(CELLS.pack_bits(band))
+                    band.clear()
+            if band:
+                file.write(CELLS.pack_bits(band))
+        if count != rows:
+            raise ValueError(f"{count} rows given for a {rows}x{cols} maze.")
+
+    @staticmethod
+    def generate(path: str, height: int, width: int, algorithm: str = 'prim', seed: Optional[int] = None,
+                 bits: bool = False):
+        """
+            Generates a maze (see MAZE_GENERATOR) and saves it with its seed, entrance and exit.
+            Eller's algorithm is streamed to the file row by row, in O(width) memory whatever the height.
+        """
+        mg = MAZE_GENERATOR(height, width, algorithm, seed=seed)
+        if algorithm == 'eller':
+            MAZE_FILE.save_rows(path, mg.stream_rows(), height, width, seed, mg.entrance, mg.exit, bits)
+        else:
+            MAZE_FILE.save(path, mg.create_cells(), height, width, seed, mg.entrance, mg.exit, bits)
+
+    @staticmethod
+    def load(path: str, writable: bool = False) -> MazeFile:
+        """
+            Maps a maze file in memory.
+
+            :param path: Path of the file.
+            :type  path: str
+            :param writable: Map the file copy-on-write, so the cells can be edited (by a Grid) without changing the file.
+            :type  writable: bool
+        """
+        with open(path, 'rb') as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY if writable else mmap.ACCESS_READ)
+
+        try:
+            if len(mapping) < MAZE_FILE.HEADER.size:
+                raise ValueError(f"{path} is too short for a maze file.")
+            magic, version, encoding, flags, rows, cols, seed, *positions = MAZE_FILE.HEADER.unpack_from(mapping)
+            if magic != MAZE_FILE.MAGIC:
+                raise ValueError(f"{path} is not a maze file.")
+            if version != MAZE_FILE.VERSION or encoding not in (MAZE_FILE.BYTES, MAZE_FILE.BITS):
+                raise ValueError(f"{path} : unsupported maze file (version {version}, encoding {encoding}).")
+
+            size = rows * cols
+            begin = MAZE_FILE.HEADER.size
+            end = begin + (size if encoding == MAZE_FILE.BYTES else (size + 7) // 8)
+            if len(mapping) < end:
+                raise ValueError(f"{path} is truncated : {len(mapping)} bytes, {end} expected.")
+
+            if encoding == MAZE_FILE.BYTES:
+                cells = memoryview(mapping)[begin:end]
+            else:
+                cells = CELLS.unpack_bits(mapping[begin:end], size)
+        except ValueError:
+            mapping.close()
+            raise
+
+        return MazeFile(mapping, cells, rows, cols, seed if flags & MAZE_FILE.HAS_SEED else None,
+                        (positions[0], positions[1]), (positions[2], positions[3]), encoding)
@@ -1,134 +1,304 @@
 # maze_generator.py
 
 import random
+from collections import deque
+from typing import Iterator, List, Optional
+
+from app.cells import CELLS
 
 class MAZE_GENERATOR:
+    """
+    Générateur de labyrinthes parfaits.
+
+    Le labyrinthe est construit sur un treillis : les cases d'indices impairs (2i+1, 2j+1) sont
+    les noeuds, les cases entre deux noeuds sont des murs que l'on perce. Toutes les structures
+    (frontière, pile, union-find, ensembles d'Eller) sont en O(1) par opération, la génération
+    est donc linéaire en nombre de cases et n'utilise jamais la récursion.
+
+    :ivar int HEIGHT: Nombre de lignes du labyrinthe.
+    :ivar int WIDTH: Nombre de colonnes du labyrinthe.
+    :ivar str algorithm: Nom de l'algorithme (voir MAZE_GENERATOR.ALGORITHMS).
+    :ivar list lab: Matrice de 'm' / 'c', remplie par create_maze.
+    """
     MUR = 'm'
     CHEMIN = 'c'
     TEMP = 'n'
     GAUCHE, DROITE, HAUT, BAS = 'g', 'd', 'h', 'b'
 
-    def __init__(self, height: int = 3, width: int = 3) -> None:
+    ALGORITHMS = ('prim', 'backtracker', 'kruskal', 'eller')
+
+    def __init__(self, height: int = 3, width: int = 3, algorithm: str = 'prim', seed: Optional[int] = None) -> None:
+        if height < 3 or width < 3:
+            raise ValueError(f"A maze needs at least 3 rows and 3 columns, got {height}x{width}.")
+        if algorithm not in MAZE_GENERATOR.ALGORITHMS:
+            raise ValueError(f"Unknown algorithm '{algorithm}', expected one of {MAZE_GENERATOR.ALGORITHMS}.")
         self.HEIGHT = height
         self.WIDTH = width
+        self.algorithm = algorithm
+        self.random = random.Random(seed)
         self.lab = []
+        # entrée et sortie, les mêmes cases que le départ et l'arrivée de l'Interface
+        self.entrance = (0, 1)
+        self.exit = (height - 1, width - 2)
+
+    def node_rows(self) -> int:
+        """ Renvoie le nombre de lignes du treillis de noeuds. """
+        return (self.HEIGHT - 1) // 2
+
+    def node_cols(self) -> int:
+        """ Renvoie le nombre de colonnes du treillis de noeuds. """
+        return (self.WIDTH - 1) // 2
+
+    def node_to_cell(self, node: int) -> int:
+        """ Renvoie l'indice d'un noeud dans le tampon de cases. """
+        i, j = divmod(node, self.node_cols())
+        return (2 * i + 1) * self.WIDTH + 2 * j + 1
+
+    def prim(self, cells: bytearray):
+        """ Prim randomisé : la frontière est une liste dont on retire un élément au hasard par échange avec le dernier. """
+        rows, cols = self.node_rows(), self.node_cols()
+        width = self.WIDTH
+        rand = self.random.random
+        # 0 : hors du labyrinthe, 1 : dans la frontière, 2 : dans le labyrinthe
+        state = bytearray(rows * cols)
+        last_row = (rows - 1) * cols
+
+        node = int(rand() * rows * cols)
+        frontier = []
+        while True:
+            # on ajoute le noeud au labyrinthe et ses voisins à la frontière
+            state[node] = 2
+            i, j = divmod(node, cols)
+            cell = (2 * i + 1) * width + 2 * j + 1
+            cells[cell] = CELLS.EMPTY
+            if node >= cols and not state[node - cols]:
+                state[node - cols] = 1
+                frontier.append(node - cols)
+            if node < last_row and not state[node + cols]:
+                state[node + cols] = 1
+                frontier.append(node + cols)
+            if j > 0 and not state[node - 1]:
+                state[node - 1] = 1
+                frontier.append(node - 1)
+            if j < cols - 1 and not state[node + 1]:
+                state[node + 1] = 1
+                frontier.append(node + 1)
 
-    def cheminsautour(self, mur):
-        autour = 0
-        if (self.lab[mur[0]-1][mur[1]] == 'c'):
-            autour += 1
-        if (self.lab[mur[0]+1][mur[1]] == 'c'):
-            autour += 1
-        if (self.lab[mur[0]][mur[1]-1] == 'c'):
-            autour +=1
-        if (self.lab[mur[0]][mur[1]+1] == 'c'):
-            autour += 1
-        return autour
-
-    def create_murs(self, case, murs, pos):
-        """ fonction qui génère le labyrinthe """   
-        c_autour = self.cheminsautour(case)
-        if c_autour<2:
-            self.lab[case[0]][case[1]]='c'
-            if pos != 'b':
-                if (case[0] != 0):
-                    if (self.lab[case[0]-1][case[1]] != 'c'):
-                        self.lab[case[0]-1][case[1]] = 'm'
-                    if ([case[0]-1, case[1]] not in murs):
-                        murs.append([case[0]-1, case[1]])
-            if pos != 'h':
-                if (case[0] != self.HEIGHT-1):
-                    if (self.lab[case[0]+1][case[1]] != 'c'):
-                        self.lab[case[0]+1][case[1]] = 'm'
-                    if ([case[0]+1, case[1]] not in murs):
-                        murs.append([case[0]+1, case[1]])
-            if pos != 'd':
-                if (case[1] != 0):
-                    if (self.lab[case[0]][case[1]-1] != 'c'):
-                        self.lab[case[0]][case[1]-1] = 'm'
-                    if ([case[0], case[1]-1] not in murs):
-                        murs.append([case[0], case[1]-1])
-            if pos != 'g':
-                if (case[1] != self.WIDTH-1):
-                    if (self.lab[case[0]][case[1]+1] != 'c'):
-                        self.lab[case[0]][case[1]+1] = 'm'
-                    if ([case[0], case[1]+1] not in murs):
-                        murs.append([case[0], case[1]+1])
-        for i in murs:
-            if i[0]==case[0] and i[1]==case[1]:
-                murs.remove(i)
-
-    def create_maze(self):
-        #création du labyrinthe, pour l'instant les cases sont vides
-        for i in range(0, self.HEIGHT):
-            ligne = []
-            for j in range(0, self.WIDTH):
-                ligne.append(MAZE_GENERATOR.TEMP)
-            self.lab.append(ligne)
-
-        #on choisit une case au hasard pour commencer le labyrinthe 
-        dep_height = random.randint(1, self.HEIGHT-2)
-        dep_width  = random.randint(1, self.WIDTH -2)
-
-        #on la transforme en chemin
-        self.lab[dep_height][dep_width] = MAZE_GENERATOR.CHEMIN
-        
-        #on rajoute des murs autour
-        murs = []
-        murs.append([dep_height - 1, dep_width])
-        murs.append([dep_height, dep_width - 1])
-        murs.append([dep_height, dep_width + 1])
-        murs.append([dep_height + 1, dep_width])
-
-        mur = MAZE_GENERATOR.MUR
-        self.lab[dep_height-1][dep_width]   = mur
-        self.lab[dep_height][dep_width - 1] = mur
-        self.lab[dep_height][dep_width + 1] = mur
-        self.lab[dep_height + 1][dep_width] = mur
-
-        #print(self.lab)
-
-        while murs:
-            #on prend un mur au hasard
-            rand_mur = murs[random.randint(0,len(murs))-1]
-            #mur de gauche
-            if rand_mur[1]!=0:
-                if (self.lab[rand_mur[0]][rand_mur[1]-1]=='n' and self.lab[rand_mur[0]][rand_mur[1]+1]=='c'):
-                    self.create_murs(rand_mur, murs, MAZE_GENERATOR.GAUCHE)				
-                    continue
-            if rand_mur[0] != 0:
-                if (self.lab[rand_mur[0]-1][rand_mur[1]] == 'n' and self.lab[rand_mur[0]+1][rand_mur[1]] == 'c'):
-                    self.create_murs(rand_mur, murs, MAZE_GENERATOR.HAUT)
-                    continue
-            if (rand_mur[0] != self.HEIGHT-1):
-                if (self.lab[rand_mur[0]+1][rand_mur[1]] == 'n' and self.lab[rand_mur[0]-1][rand_mur[1]] == 'c'):
-                    self.create_murs(rand_mur, murs, MAZE_GENERATOR.BAS)
-                    continue
-            if (rand_mur[1] != self.WIDTH-1):
-                if (self.lab[rand_mur[0]][rand_mur[1]+1] == 'n' and self.lab[rand_mur[0]][rand_mur[1]-1] == 'c'):
-                    self.create_murs(rand_mur, murs, MAZE_GENERATOR.DROITE)
-                    continue
-            for i in murs:
-                if i[0]==rand_mur[0] and i[1]==rand_mur[1]:
-                    murs.remove(i)
-        
-        # on transforme les cases restantes en murs
-        for i in range(0, self.HEIGHT):
-            for j in range(0, self.WIDTH):
-                if (self.lab[i][j] == 'n'):
-                    self.lab[i][j] = 'm'
-
-        # on  définit une entrée et une sortie
-        for i in range(0, self.WIDTH):
-            if (self.lab[1][i] == 'c'):
-                self.lab[0][i] = 'c'
+            if not frontier:
                 break
 
-        for i in range(self.WIDTH-1, 0, -1):
-            if (self.lab[self.HEIGHT-2][i] == 'c'):
-                self.lab[self.HEIGHT-1][i] = 'c'
+            # on prend un noeud de la frontière au hasard
+            k = int(rand() * len(frontier))
+            node = frontier[k]
+            frontier[k] = frontier[-1]
+            frontier.pop()
+
+            # on perce le mur vers un de ses voisins déjà dans le labyrinthe
+            i, j = divmod(node, cols)
+            cell = (2 * i + 1) * width + 2 * j + 1
+            walls = []
+            if node >= cols and state[node - cols] == 2:
+                walls.append(cell - width)
+            if node < last_row and state[node + cols] == 2:
+                walls.append(cell + width)
+            if j > 0 and state[node - 1] == 2:
+                walls.append(cell - 1)
+            if j < cols - 1 and state[node + 1] == 2:
+                walls.append(cell + 1)
+            cells[walls[int(rand() * len(walls))]] = CELLS.EMPTY
+
+    def backtracker(self, cells: bytearray):
+        """ Backtracker récursif, avec une pile explicite (pas de limite de récursion). """
+        rows, cols = self.node_rows(), self.node_cols()
+        width = self.WIDTH
+        rand = self.random.random
+        visited = bytearray(rows * cols)
+        last_row = (rows - 1) * cols
+
+        node = int(rand() * rows * cols)
+        visited[node] = 1
+        cells[self.node_to_cell(node)] = CELLS.EMPTY
+        stack = [node]
+        while stack:
+            node = stack[-1]
+            j = node % cols
+            nexts = []
+            if node >= cols and not visited[node - cols]:
+                nexts.append(node - cols)
+            if node < last_row and not visited[node + cols]:
+                nexts.append(node + cols)
+            if j > 0 and not visited[node - 1]:
+                nexts.append(node - 1)
+            if j < cols - 1 and not visited[node + 1]:
+                nexts.append(node + 1)
+
+            if not nexts:
+                stack.pop()
+                continue
+
+            nxt = nexts[int(rand() * len(nexts))]
+            visited[nxt] = 1
+            i, j = divmod(nxt, cols)
+            cell = (2 * i + 1) * width + 2 * j + 1
+            cells[cell] = CELLS.EMPTY
+            # le mur entre les deux noeuds
+            if nxt == node - cols:
+                cells[cell + width] = CELLS.EMPTY
+            elif nxt == node + cols:
+                cells[cell - width] = CELLS.EMPTY
+            elif nxt == node - 1:
+                cells[cell + 1] = CELLS.EMPTY
+            else:
+                cells[cell - 1] = CELLS.EMPTY
+            stack.append(nxt)
+
+    def kruskal(self, cells: bytearray):
+        """ Kruskal randomisé, avec un union-find (compression de chemin par division). """
+        rows, cols = self.node_rows(), self.node_cols()
+        parent = list(range(rows * cols))
+
+        # arête = 2 * noeud + 0 (vers la droite) ou 1 (vers le bas)
+        edges = [2 * node for node in range(rows * cols) if node % cols != cols - 1]
+        edges += [2 * node + 1 for node in range((rows - 1) * cols)]
+        self.random.shuffle(edges)
+
+        width = self.WIDTH
+        for i in range(rows):
+            start = (2 * i + 1) * width + 1
+            cells[start:start + 2 * cols:2] = bytes(cols)
+
+        for edge in edges:
+            a = edge >> 1
+            b = a + cols if edge & 1 else a + 1
+            root_a, root_b = a, b
+            while parent[root_a] != root_a:
+                parent[root_a] = parent[parent[root_a]]
+                root_a = parent[root_a]
+            while parent[root_b] != root_b:
+                parent[root_b] = parent[parent[root_b]]
+                root_b = parent[root_b]
+            if root_a == root_b:
+                continue
+            parent[root_a] = root_b
+            # le mur est juste en dessous ou juste à droite du noeud a
+            i, j = divmod(a, cols)
+            cells[(2 * i + 1) * width + 2 * j + 1 + (width if edge & 1 else 1)] = CELLS.EMPTY
+
+    def eller_rows(self) -> Iterator[bytearray]:
+        """
+            Algorithme d'Eller : renvoie les lignes de cases une par une, seule la ligne courante est gardée en mémoire.
+        """
+        rows, cols = self.node_rows(), self.node_cols()
+        width = self.WIDTH
+        rand = self.random.random
+
+        yield bytearray([CELLS.BARRIER]) * width
+
+        # ensemble de chaque noeud de la ligne courante, -1 si aucun
+        sets = [-1] * cols
+        for i in range(rows):
+            last = i == rows - 1
+            # numérotation des nouveaux ensembles et union-find local à la ligne
+            parent = list(range(2 * cols))
+            used = set(sets)
+            fresh = (label for label in range(2 * cols) if label not in used)
+            for j in range(cols):
+                if sets[j] < 0:
+                    sets[j] = next(fresh)
+
+            def find(label):
+                while parent[label] != label:
+                    parent[label] = parent[parent[label]]
+                    label = parent[label]
+                return label
+
+            row = bytearray([CELLS.BARRIER]) * width
+            row[1:2 * cols:2] = bytes(cols)
+            # on relie des voisins horizontaux d'ensembles différents
+            for j in range(cols - 1):
+                a, b = find(sets[j]), find(sets[j + 1])
+                if a != b and (last or rand() < 0.5):
+                    parent[a] = b
+                    row[2 * j + 2] = CELLS.EMPTY
+            yield row
+
+            if last:
                 break
-        
+
+            # chaque ensemble descend au moins une fois
+            below = bytearray([CELLS.BARRIER]) * width
+            groups = {}
+            for j in range(cols):
+                groups.setdefault(find(sets[j]), []).append(j)
+            sets = [-1] * cols
+            for label, members in groups.items():
+                down = [j for j in members if rand() < 0.5]
+                if not down:
+                    down = [members[int(rand() * len(members))]]
+                for j in down:
+                    sets[j] = label
+                    below[2 * j + 1] = CELLS.EMPTY
+            yield below
+
+        # lignes de murs restantes sous la dernière ligne de noeuds (deux quand la hauteur est paire)
+        for _ in range(2 * rows, self.HEIGHT):
+            yield bytearray([CELLS.BARRIER]) * width
+
+    def eller(self, cells: bytearray):
+        """ Algorithme d'Eller, ligne par ligne. """
+        width = self.WIDTH
+        for i, row in enumerate(self.eller_rows()):
+            cells[i * width:(i + 1) * width] = row
+
+    def stream_rows(self) -> Iterator[bytearray]:
+        """
+            Renvoie les lignes d'un labyrinthe d'Eller avec son entrée et sa sortie, les mêmes cases que
+            create_cells, en ne gardant que les dernières lignes en mémoire : O(WIDTH) quelle que soit la hauteur.
+        """
+        if self.algorithm != 'eller':
+            raise ValueError(f"Only Eller's algorithm generates a maze row by row, not '{self.algorithm}'.")
+        width = self.WIDTH
+        # la porte de sortie peut descendre jusqu'à la dernière ligne de noeuds, deux lignes au-dessus du bord
+        tail = deque()
+        for i, row in enumerate(self.eller_rows()):
+            if i == 0:
+                # sous l'entrée (0, 1) se trouve toujours le noeud (1, 1)
+                row[self.entrance[1]] = CELLS.EMPTY
+            tail.append(row)
+            if len(tail) > 3:
+                yield tail.popleft()
+
+        block = bytearray().join(tail)
+        self.open_door(block, len(tail) - 1, self.exit[1], -1)
+        for i in range(len(tail)):
+            yield block[i * width:(i + 1) * width]
+
+    def open_door(self, cells: bytearray, row: int, col: int, step: int):
+        """
+            Ouvre la case du bord (row, col) et creuse vers l'intérieur (step = 1 : vers le bas, -1 : vers le haut)
+            jusqu'à un chemin, la porte est donc toujours reliée même quand une dimension est paire.
+        """
+        width = self.WIDTH
+        while True:
+            cells[row * width + col] = CELLS.EMPTY
+            inside = row + step
+            if cells[inside * width + col] == CELLS.EMPTY or cells[row * width + col - 1] == CELLS.EMPTY:
+                return
+            row = inside
+
+    def create_cells(self) -> bytearray:
+        """ Renvoie le labyrinthe sous forme de tampon de cases (voir app/cells.py), ligne par ligne. """
+        cells = bytearray([CELLS.BARRIER]) * (self.HEIGHT * self.WIDTH)
+        getattr(self, self.algorithm)(cells)
+
+        # on définit une entrée et une sortie
+        self.open_door(cells, self.entrance[0], self.entrance[1], 1)
+        self.open_door(cells, self.exit[0], self.exit[1], -1)
+        return cells
+
+    def create_maze(self) -> List[List[str]]:
+        """ Renvoie le labyrinthe sous forme de matrice de 'm' / 'c'. """
+        self.lab = CELLS.to_lab(self.create_cells(), self.WIDTH)
         return self.lab
 
 if __name__ == '__main__':
@@ -139,4 +309,4 @@ if __name__ == '__main__':
     mg.create_maze()
 
     for row in mg.lab:
-        print(' '.join([Fore.RED+thing if thing=='c' else Fore.GREEN+thing for thing in row]))
\ No newline at end of file
+        print(' '.join([Fore.RED+thing if thing=='c' else Fore.GREEN+thing for thing in row]))
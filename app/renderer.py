@@ -0,0 +1,141 @@
+# renderer.py
+
+import math
+import pygame
+from typing import List, Optional, Tuple
+
+from app.camera import CAMERA
+from app.colors import COLORS
+
+class RENDERER:
+    """
+    A class object drawing a Grid on the window through a camera, from a pixel buffer.
+
+    The visible cells are copied from the state buffer of the grid (one strided slice per row)
+    into a small palette-indexed surface, one pixel per cell (per block of cells when they are
+    smaller than CAMERA.MIN_CELL_PIXELS), sent to the window with one scaled blit. The grid lines
+    are an optional overlay, rendered once per view. A frame is a handful of C-level calls, its
+    cost depends on the size of the window, not on the size of the grid, and nothing is drawn
+    when neither the grid (Grid.dirty) nor the view changed.
+
+    :ivar pygame.Surface window: The pygame.Surface instance used as the window.
+    :ivar Grid grid: The Grid to draw.
+    :ivar CAMERA camera: The view on the grid (pan and zoom).
+    :ivar bool show_lines: Draw the grid lines (when the cells are at least LINES_MIN_ZOOM pixels)?
+    :ivar list overlay: Lines of text drawn over the view (e.g. SearchStats.lines), None for no overlay.
+    """
+
+    # the grid lines are drawn when the cells are at least this size (pixels)
+    LINES_MIN_ZOOM = 6
+    BACKGROUND = COLORS.GREY
+    OVERLAY_FONT_SIZE = 14
+    # background of the overlay (RGBA)
+    OVERLAY_BACKGROUND = (0, 0, 0, 160)
+
+    def __init__(self, window: pygame.Surface, grid, camera: Optional[CAMERA] = None, show_lines: bool = True):
+        self.window = window
+        self.grid = grid
+        self.camera = camera or CAMERA(window.get_width(), window.get_height(), grid.rows, grid.cols)
+        self.show_lines = show_lines
+        self.lines = None
+        self.overlay = None
+        self.font = None
+        # camera state of the last frame, and the cells and pixels it covers (see RENDERER.layout)
+        self.view = None
+        self.area = None
+        grid.dirty = True
+
+    def layout(self) -> Tuple[Tuple[range, range], pygame.Rect]:
+        """
+            Returns the visible cells, as (rows, cols) ranges of the cells read (one per block),
+            and the rect of the window they cover.
+        """
+        camera = self.camera
+        block = camera.block()
+        first_row, end_row, first_col, end_col = camera.visible()
+        rows, cols = range(first_row, end_row, block), range(first_col, end_col, block)
+        x, y = camera.to_x(first_row), camera.to_y(first_col)
+        rect = pygame.Rect(x, y, camera.to_x(first_row + len(rows) * block) - x, camera.to_y(first_col + len(cols) * block) - y)
+        return (rows, cols), rect
+
+    def make_pixels(self) -> pygame.Surface:
+        """ Returns the visible cells as a palette-indexed surface, one pixel per cell read. """
+        (rows, cols), _ = self.area
+        cells, width = self.grid.cells, self.grid.cols
+        first, end, step = cols.start, cols.stop, cols.step
+        data = b''.join([bytes(cells[row * width + first:row * width + end:step]) for row in rows])
+        pixels = pygame.image.frombuffer(data, (len(cols), len(rows)), 'P')
+        pixels.set_palette(COLORS.PALETTE)
+        # the buffer is row by row and the rows of the grid go along x : transposed
+        return pygame.transform.flip(pygame.transform.rotate(pixels, -90), True, False)
+
+    def make_lines(self) -> Optional[pygame.Surface]:
+        """
+            Returns a transparent layer with the lines of the visible cells, at the edges of the pixels
+            of pygame.transform.scale, None when they are not shown.
+        """
+        (rows, cols), rect = self.area
+        if not self.show_lines or self.camera.zoom < RENDERER.LINES_MIN_ZOOM or rows.step > 1:
+            return None
+        lines = pygame.Surface(self.window.get_size(), pygame.SRCALPHA)
+        for i in range(len(rows) + 1):
+            x = rect.x + math.ceil(i * rect.width / len(rows))
+            pygame.draw.line(lines, COLORS.GREY, (x, rect.top), (x, rect.bottom))
+        for j in range(len(cols) + 1):
+            y = rect.y + math.ceil(j * rect.height / len(cols))
+            pygame.draw.line(lines, COLORS.GREY, (rect.left, y), (rect.right, y))
+        return lines
+
+    def toggle_lines(self):
+        """ Shows or hides the grid lines. """
+        self.show_lines = not self.show_lines
+        self.view = None
+
+    def set_overlay(self, overlay: Optional[List[str]]):
+        """ Shows lines of text over the view, None to hide them. The view is drawn again only when they change. """
+        if overlay != self.overlay:
+            self.overlay = overlay
+            self.grid.dirty = True
+
+    def make_overlay(self) -> pygame.Surface:
+        """ Returns the overlay text on a translucent background. """
+        if self.font is None:
+            self.font = pygame.font.SysFont('monospace', RENDERER.OVERLAY_FONT_SIZE)
+        texts = [self.font.render(line, True, COLORS.WHITE) for line in self.overlay]
+        height = self.font.get_linesize()
+        surface = pygame.Surface((max(text.get_width() for text in texts) + 8, len(texts) * height + 8), pygame.SRCALPHA)
+        surface.fill(RENDERER.OVERLAY_BACKGROUND)
+        for i, text in enumerate(texts):
+            surface.blit(text, (4, 4 + i * height))
+        return surface
+
+    def draw(self) -> List[pygame.Rect]:
+        """ Draws the view if the grid or the view changed since the last call and returns the rects to update. """
+        grid, camera, window = self.grid, self.camera, self.window
+        if self.view == camera.state() and not grid.dirty:
+            return []
+
+        if self.view != camera.state():
+            self.view = camera.state()
+            self.area = self.layout()
+            self.lines = self.make_lines()
+
+        window.fill(RENDERER.BACKGROUND)
+        (rows, cols), rect = self.area
+        if rows and cols:
+            # the last block of a row or a column may go past the edge of the grid
+            window.set_clip(pygame.Rect(camera.rect(0, 0)).union(camera.rect(grid.rows - 1, grid.cols - 1)))
+            window.blit(pygame.transform.scale(self.make_pixels(), rect.size), rect)
+            window.set_clip(None)
+        if self.lines:
+            window.blit(self.lines, (0, 0))
+        if self.overlay:
+            window.blit(self.make_overlay(), (0, 0))
+        grid.dirty = False
+        return [window.get_rect()]
+
+    def display(self):
+        """ Draws what changed and updates the screen. """
+        rects = self.draw()
+        if rects:
+            pygame.display.update(rects)
@@ -0,0 +1,612 @@
+# solver.py
+
+"""
+    Headless solvers.
+
+    They work on a flat buffer of cells (see app/cells.py) indexed by row * cols + col,
+    never touch a Spot and never import pygame. The visual algorithms of app/algorithms.py
+    are thin consumers of this module.
+"""
+
+import time
+from array import array
+from collections import deque
+from functools import partial
+from heapq import heappush, heappop
+from typing import Callable, Generator, List, NamedTuple, Optional, Tuple
+
+from app.cells import CELLS
+from app.stats import SearchStats
+
+class SearchResult(NamedTuple):
+    """
+    Result of a headless search.
+
+    :ivar bool found: Has a path been found?
+    :ivar list path: (row, col) positions from start to end (both included), empty if not found.
+    :ivar int cost: Number of moves of the path, -1 if not found.
+    :ivar int expanded: Number of expanded cells.
+    :ivar SearchStats stats: Counters and timings of the search, None unless asked for (see app/stats.py).
+    """
+    found: bool
+    path: List[Tuple[int, int]]
+    cost: int
+    expanded: int
+    stats: Optional[SearchStats] = None
+
+INF = float('inf')
+
+class Scores(dict):
+    """ Sparse scores : a missing cell has an infinite score, without being inserted. """
+
+    def __missing__(self, key):
+        return INF
+
+class HEURISTICS:
+    """ Heuristics for A*, called with (row, col, end_row, end_col). All of them are admissible on a 4-connected grid. """
+
+    @staticmethod
+    def manhattan(row, col, end_row, end_col):
+        return abs(row - end_row) + abs(col - end_col)
+
+    @staticmethod
+    def euclidean(row, col, end_row, end_col):
+        return ((row - end_row) ** 2 + (col - end_col) ** 2) ** 0.5
+
+    @staticmethod
+    def chebyshev(row, col, end_row, end_col):
+        return max(abs(row - end_row), abs(col - end_col))
+
+    @staticmethod
+    def zero(row, col, end_row, end_col):
+        """ No estimation : A* becomes Dijkstra. """
+        return 0
+
+class SOLVER:
+    """ This class has the headless search algorithms. """
+
+    # tie_break -> (weight of g in the second key, step of the insertion counter)
+    TIE_BREAKS = {
+        'fifo': (0, 1),     # oldest cell first
+        'lifo': (0, -1),    # newest cell first
+        'high_g': (-1, 1),  # deepest cell first, usually the fewest expansions
+        'low_g': (1, 1),    # shallowest cell first
+    }
+
+    @staticmethod
+    def prepare(maze, cols: Optional[int] = None) -> Tuple[object, int, int]:
+        """
+            Returns (cells, rows, cols) from a lab matrix or from a flat buffer.
+
+            :param maze: MAZE_GENERATOR.lab matrix or flat buffer (bytes, bytearray, array('B')...).
+            :param cols: Number of columns, required with a flat buffer.
+            :type  cols: int
+        """
+        if cols is None:
+            return CELLS.from_lab(maze)
+        return maze, len(maze) // cols, cols
+
+    @staticmethod
+    def neighbors(cells, rows: int, cols: int, index: int) -> List[int]:
+        """ Returns the free neighbors of a cell (down, up, right, left). """
+        barrier = CELLS.BARRIER
+        row, col = divmod(index, cols)
+        result = []
+        if row < rows - 1 and cells[index + cols] != barrier:
+            result.append(index + cols)
+        if row > 0 and cells[index - cols] != barrier:
+            result.append(index - cols)
+        if col < cols - 1 and cells[index + 1] != barrier:
+            result.append(index + 1)
+        if col > 0 and cells[index - 1] != barrier:
+            result.append(index - 1)
+        return result
+
+    @staticmethod
+    def neighbor_function(cells, cols: int, links=None) -> Callable[[int], List[int]]:
+        """
+            Returns a function giving the free neighbors of a cell index.
+
+            :param cells: Flat buffer of cell states.
+            :param cols: Number of columns.
+            :type  cols: int
+            :param links: Link masks kept by the grid (see CELLS.links). Without them the neighbors
+                          are computed lazily from the cells, so nothing has to be swept before a search.
+        """
+        if links is None:
+            return partial(SOLVER.neighbors, cells, len(cells) // cols, cols)
+
+        offsets = CELLS.link_offsets(cols)
+
+        def linked_neighbors(index):
+            return [index + offset for offset in offsets[links[index]]]
+
+        return linked_neighbors
+
+    @staticmethod
+    def build_result(came_from: dict, start: int, end: int, cols: int, expanded: int,
+                     stats: Optional[SearchStats] = None) -> SearchResult:
+        """ Walks came_from back from end to start and returns the SearchResult. """
+        begin = time.perf_counter()
+        path = [end]
+        current = end
+        while current != start:
+            current = came_from[current]
+            path.append(current)
+        path.reverse()
+        path = [divmod(index, cols) for index in path]
+        if stats is not None:
+            stats.add_time('reconstruction', begin)
+        return SearchResult(True, path, len(path) - 1, expanded)
+
+    @staticmethod
+    def neighbors_timed(cells, cols: int, links, stats: Optional[SearchStats]) -> Callable[[int], List[int]]:
+        """ SOLVER.neighbor_function, timed as the 'neighbors' phase of the stats. """
+        begin = time.perf_counter()
+        neighbors = SOLVER.neighbor_function(cells, cols, links)
+        if stats is not None:
+            stats.add_time('neighbors', begin)
+        return neighbors
+
+    @staticmethod
+    def record_pushes(stats: SearchStats, pushed: int, g_score):
+        """ Records the pushes of an A* search : the pushes of a cell after its first one (the source is never pushed) are reopens. """
+        reached = len(g_score) if isinstance(g_score, dict) else len(g_score) - g_score.count(INF)
+        stats.pushed = pushed
+        stats.reopens = pushed - (reached - 1)
+
+    @staticmethod
+    def a_star_steps(cells, cols: int, start: Tuple[int, int], end: Tuple[int, int],
+                     on_push: Optional[Callable[[int], None]] = None,
+                     on_expand: Optional[Callable[[int], None]] = None, links=None,
+                     heuristic: Callable[[int, int, int, int], float] = HEURISTICS.manhattan,
+                     tie_break: str = 'high_g', scores: str = 'sparse',
+                     stepping: bool = False, stats: Optional[SearchStats] = None) -> Generator[int, None, SearchResult]:
+        """
+            A* search on a flat buffer of cells.
+            The open set is a plain heapq list with lazy deletion : an outdated entry is skipped when popped.
+
+            :param cells: Flat buffer of cell states.
+            :param cols: Number of columns.
+            :type  cols: int
+            :param start: (row, col) of the start cell.
+            :param end: (row, col) of the end cell.
+            :param on_push: Called with the index of every cell pushed in the open set.
+            :param on_expand: Called with the index of every expanded cell.
+            :param links: Link masks of the grid (see SOLVER.neighbor_function).
+            :param heuristic: Estimation of the distance (row, col, end_row, end_col), see HEURISTICS.
+            :param tie_break: Order of the cells with the same f score (see SOLVER.TIE_BREAKS).
+            :type  tie_break: str
+            :param scores: 'sparse' (dicts filled on demand) or 'flat' (arrays preallocated for the whole grid).
+            :type  scores: str
+            :param stepping: Yield the index of every expanded cell, so the search can be resumed step by step.
+            :param stats: Filled with the counters of the search (see app/stats.py), its timings need SOLVER.finish or SearchStats.measure.
+        """
+        if tie_break not in SOLVER.TIE_BREAKS:
+            raise ValueError(f"Unknown tie break '{tie_break}', expected one of {sorted(SOLVER.TIE_BREAKS)}.")
+        if scores not in ('sparse', 'flat'):
+            raise ValueError(f"Unknown scores storage '{scores}', expected 'sparse' or 'flat'.")
+
+        source = start[0] * cols + start[1]
+        target = end[0] * cols + end[1]
+        end_row, end_col = end
+        neighbors = SOLVER.neighbors_timed(cells, cols, links, stats)
+        g_weight, order = SOLVER.TIE_BREAKS[tie_break]
+
+        if scores == 'flat':
+            g_score = array('d', [INF]) * len(cells)
+            came_from = array('l', [-1]) * len(cells)
+        else:
+            g_score = Scores()
+            came_from = {}
+        g_score[source] = 0
+
+        count = 0
+        expanded = 0
+        open_set = [(heuristic(start[0], start[1], end_row, end_col), 0, count, source, 0)]
+
+        while open_set:
+            _, _, _, current, current_g = heappop(open_set)
+            if current_g > g_score[current]:
+                # outdated entry, the cell has been pushed again with a better score
+                continue
+
+            if current == target:
+                if stats is not None:
+                    SOLVER.record_pushes(stats, abs(count), g_score)
+                return SOLVER.build_result(came_from, source, target, cols, expanded, stats)
+
+            expanded += 1
+            temp_g_score = current_g + 1
+
+            for neighbor in neighbors(current):
+                if temp_g_score >= g_score[neighbor]:
+                    continue
+                came_from[neighbor] = current
+                g_score[neighbor] = temp_g_score
+                row, col = divmod(neighbor, cols)
+                count += order
+                heappush(open_set, (temp_g_score + heuristic(row, col, end_row, end_col),
+                                    g_weight * temp_g_score, count, neighbor, temp_g_score))
+                if on_push is not None:
+                    on_push(neighbor)
+
+            if stats is not None:
+                stats.open_size(len(open_set))
+            if on_expand is not None:
+                on_expand(current)
+            if stepping:
+                yield current
+
+        if stats is not None:
+            SOLVER.record_pushes(stats, abs(count), g_score)
+        return SearchResult(False, [], -1, expanded)
+
+    @staticmethod
+    def bfs_steps(cells, cols: int, start: Tuple[int, int], end: Tuple[int, int],
+                  on_push: Optional[Callable[[int], None]] = None,
+                  on_expand: Optional[Callable[[int], None]] = None, links=None,
+                  stepping: bool = False, stats: Optional[SearchStats] = None) -> Generator[int, None, SearchResult]:
+        """
+            Breadth First Search on a flat buffer of cells.
+
+            :param cells: Flat buffer of cell states.
+            :param cols: Number of columns.
+            :type  cols: int
+            :param start: (row, col) of the start cell.
+            :param end: (row, col) of the end cell.
+            :param on_push: Called with the index of every discovered cell.
+            :param on_expand: Called with the index of every expanded cell.
+            :param links: Link masks of the grid (see SOLVER.neighbor_function).
+            :param stepping: Yield the index of every expanded cell, so the search can be resumed step by step.
+            :param stats: Filled with the counters of the search (see app/stats.py), its timings need SOLVER.finish or SearchStats.measure.
+        """
+        source = start[0] * cols + start[1]
+        target = end[0] * cols + end[1]
+        neighbors = SOLVER.neighbors_timed(cells, cols, links, stats)
+
+        visited = bytearray(len(cells))
+        visited[source] = 1
+        came_from = {}
+        queue = deque([source])
+        expanded = 0
+
+        while queue:
+            current = queue.popleft()
+
+            if current == target:
+                if stats is not None:
+                    stats.pushed = len(came_from)
+                return SOLVER.build_result(came_from, source, target, cols, expanded, stats)
+
+            expanded += 1
+            for neighbor in neighbors(current):
+                if not visited[neighbor]:
+                    visited[neighbor] = 1
+                    came_from[neighbor] = current
+                    queue.append(neighbor)
+                    if on_push is not None:
+                        on_push(neighbor)
+
+            if stats is not None:
+                stats.open_size(len(queue))
+            if on_expand is not None:
+                on_expand(current)
+            if stepping:
+                yield current
+
+        if stats is not None:
+            stats.pushed = len(came_from)
+        return SearchResult(False, [], -1, expanded)
+
+    @staticmethod
+    def bidirectional_bfs_steps(cells, cols: int, start: Tuple[int, int], end: Tuple[int, int],
+                                on_push: Optional[Callable[[int], None]] = None,
+                                on_expand: Optional[Callable[[int], None]] = None, links=None,
+                                stepping: bool = False, stats: Optional[SearchStats] = None) -> Generator[int, None, SearchResult]:
+        """
+            Breadth First Search from both start and end, meeting in the middle.
+            The side with the smallest frontier expands a whole level at a time,
+            so the first level where both searches meet gives a shortest path.
+
+            :param cells: Flat buffer of cell states.
+            :param cols: Number of columns.
+            :type  cols: int
+            :param start: (row, col) of the start cell.
+            :param end: (row, col) of the end cell.
+            :param on_push: Called with the index of every discovered cell.
+            :param on_expand: Called with the index of every expanded cell.
+            :param links: Link masks of the grid (see SOLVER.neighbor_function).
+            :param stepping: Yield the index of every expanded cell, so the search can be resumed step by step.
+            :param stats: Filled with the counters of the search (see app/stats.py), its timings need SOLVER.finish or SearchStats.measure.
+        """
+        source = start[0] * cols + start[1]
+        target = end[0] * cols + end[1]
+        neighbors = SOLVER.neighbors_timed(cells, cols, links, stats)
+
+        if source == target:
+            return SearchResult(True, [start], 0, 0)
+        if cells[target] == CELLS.BARRIER:
+            # never reached by the other searches : the backward search mustn't start from it
+            return SearchResult(False, [], -1, 0)
+
+        # 1 : seen from the start, 2 : seen from the end
+        visited = bytearray(len(cells))
+        visited[source] = 1
+        visited[target] = 2
+        came_from = ({}, {})
+        depth = ({source: 0}, {target: 0})
+        frontiers = [[source], [target]]
+        expanded = 0
+
+        while frontiers[0] and frontiers[1]:
+            if stats is not None:
+                stats.open_size(len(frontiers[0]) + len(frontiers[1]))
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            mark = side + 1
+            parents, dist, other_dist = came_from[side], depth[side], depth[1 - side]
+            meeting = None
+            next_frontier = []
+
+            for current in frontiers[side]:
+                expanded += 1
+                temp_depth = dist[current] + 1
+                for neighbor in neighbors(current):
+                    seen = visited[neighbor]
+                    if seen == mark:
+                        continue
+                    if seen:
+                        length = temp_depth + other_dist[neighbor]
+                        if meeting is None or length < meeting[0]:
+                            meeting = (length, current, neighbor)
+                        continue
+                    visited[neighbor] = mark
+                    parents[neighbor] = current
+                    dist[neighbor] = temp_depth
+                    next_frontier.append(neighbor)
+                    if on_push is not None:
+                        on_push(neighbor)
+
+                if on_expand is not None:
+                    on_expand(current)
+                if stepping:
+                    yield current
+
+            if meeting is not None:
+                begin = time.perf_counter()
+                _, forward, backward = meeting if side == 0 else (meeting[0], meeting[2], meeting[1])
+                path = [forward]
+                while path[-1] != source:
+                    path.append(came_from[0][path[-1]])
+                path.reverse()
+                path.append(backward)
+                while path[-1] != target:
+                    path.append(came_from[1][path[-1]])
+                if stats is not None:
+                    stats.add_time('reconstruction', begin)
+                    stats.pushed = len(came_from[0]) + len(came_from[1])
+                return SearchResult(True, [divmod(index, cols) for index in path], len(path) - 1, expanded)
+
+            frontiers[side] = next_frontier
+
+        if stats is not None:
+            stats.pushed = len(came_from[0]) + len(came_from[1])
+        return SearchResult(False, [], -1, expanded)
+
+    @staticmethod
+    def jump_point_search_steps(cells, cols: int, start: Tuple[int, int], end: Tuple[int, int],
+                                on_push: Optional[Callable[[int], None]] = None,
+                                on_expand: Optional[Callable[[int], None]] = None,
+                                stepping: bool = False, stats: Optional[SearchStats] = None) -> Generator[int, None, SearchResult]:
+        """
+            Jump Point Search adapted to 4-connected uniform-cost grids.
+
+            A* only pushes jump points : a horizontal jump stops in front of a forced neighbor (an open
+            cell above or below whose cell behind is a wall), a vertical jump also stops where a horizontal
+            jump would find a jump point. Straight runs between jump points are never pushed, the path is
+            still optimal and is expanded back to every cell at the end.
+
+            :param cells: Flat buffer of cell states.
+            :param cols: Number of columns.
+            :type  cols: int
+            :param start: (row, col) of the start cell.
+            :param end: (row, col) of the end cell.
+            :param on_push: Called with the index of every jump point pushed in the open set.
+            :param on_expand: Called with the index of every expanded jump point.
+            :param stepping: Yield the index of every expanded cell, so the search can be resumed step by step.
+            :param stats: Filled with the counters of the search (see app/stats.py), its timings need SOLVER.finish or SearchStats.measure.
+        """
+        rows = len(cells) // cols
+        barrier = CELLS.BARRIER
+        source = start[0] * cols + start[1]
+        target = end[0] * cols + end[1]
+        end_row, end_col = end
+
+        def free(row, col):
+            return 0 <= row < rows and 0 <= col < cols and cells[row * cols + col] != barrier
+
+        def jump_horizontal(row, col, d_col):
+            """ Returns the column of the next horizontal jump point from (row, col), None if there is none. """
+            while free(row, col):
+                if row == end_row and col == end_col:
+                    return col
+                if (free(row - 1, col) and not free(row - 1, col - d_col)) or \
+                   (free(row + 1, col) and not free(row + 1, col - d_col)):
+                    return col
+                col += d_col
+            return None
+
+        def jump(row, col, d_row, d_col):
+            """ Returns the index of the next jump point from (row, col) in the direction, None if there is none. """
+            if d_col:
+                col = jump_horizontal(row, col, d_col)
+                return None if col is None else row * cols + col
+            while free(row, col):
+                if row == end_row and col == end_col:
+                    return row * cols + col
+                if (free(row, col - 1) and not free(row - d_row, col - 1)) or \
+                   (free(row, col + 1) and not free(row - d_row, col + 1)):
+                    return row * cols + col
+                if jump_horizontal(row, col + 1, 1) is not None or jump_horizontal(row, col - 1, -1) is not None:
+                    return row * cols + col
+                row += d_row
+            return None
+
+        g_score = Scores()
+        g_score[source] = 0
+        came_from = {}
+        count = 0
+        expanded = 0
+        open_set = [(abs(start[0] - end_row) + abs(start[1] - end_col), 0, count, source, 0)]
+
+        while open_set:
+            _, _, _, current, current_g = heappop(open_set)
+            if current_g > g_score[current]:
+                continue
+
+            if current == target:
+                begin = time.perf_counter()
+                jump_points = SOLVER.build_result(came_from, source, target, cols, expanded).path
+                path = [jump_points[0]]
+                for row, col in jump_points[1:]:
+                    last_row, last_col = path[-1]
+                    d_row, d_col = (row > last_row) - (row < last_row), (col > last_col) - (col < last_col)
+                    while path[-1] != (row, col):
+                        path.append((path[-1][0] + d_row, path[-1][1] + d_col))
+                if stats is not None:
+                    stats.add_time('reconstruction', begin)
+                    SOLVER.record_pushes(stats, count, g_score)
+                return SearchResult(True, path, len(path) - 1, expanded)
+
+            expanded += 1
+            row, col = divmod(current, cols)
+
+            # pruned directions : all of them from the start, else straight on and sideways
+            if current == source:
+                directions = ((1, 0), (-1, 0), (0, 1), (0, -1))
+            else:
+                parent_row, parent_col = divmod(came_from[current], cols)
+                d_row, d_col = (row > parent_row) - (row < parent_row), (col > parent_col) - (col < parent_col)
+                if d_col:
+                    directions = ((0, d_col), (1, 0), (-1, 0))
+                else:
+                    directions = ((d_row, 0), (0, 1), (0, -1))
+
+            for d_row, d_col in directions:
+                jump_point = jump(row + d_row, col + d_col, d_row, d_col)
+                if jump_point is None:
+                    continue
+                jump_row, jump_col = divmod(jump_point, cols)
+                temp_g_score = current_g + abs(jump_row - row) + abs(jump_col - col)
+                if temp_g_score >= g_score[jump_point]:
+                    continue
+                came_from[jump_point] = current
+                g_score[jump_point] = temp_g_score
+                count += 1
+                heappush(open_set, (temp_g_score + abs(jump_row - end_row) + abs(jump_col - end_col),
+                                    -temp_g_score, count, jump_point, temp_g_score))
+                if on_push is not None:
+                    on_push(jump_point)
+
+            if stats is not None:
+                stats.open_size(len(open_set))
+            if on_expand is not None:
+                on_expand(current)
+            if stepping:
+                yield current
+
+        if stats is not None:
+            SOLVER.record_pushes(stats, count, g_score)
+        return SearchResult(False, [], -1, expanded)
+
+    @staticmethod
+    def finish(steps: Generator[int, None, SearchResult], stats: Optional[SearchStats] = None) -> SearchResult:
+        """ Runs a search generator to the end and returns its result, timed by stats when given (see SearchStats.measure). """
+        if stats is not None:
+            steps = stats.measure(steps)
+        try:
+            while True:
+                next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+    @staticmethod
+    def a_star(*args, **kwargs) -> SearchResult:
+        """ A* search run to the end, see SOLVER.a_star_steps. """
+        return SOLVER.finish(SOLVER.a_star_steps(*args, **kwargs), kwargs.get('stats'))
+
+    @staticmethod
+    def bfs(*args, **kwargs) -> SearchResult:
+        """ Breadth First Search run to the end, see SOLVER.bfs_steps. """
+        return SOLVER.finish(SOLVER.bfs_steps(*args, **kwargs), kwargs.get('stats'))
+
+    @staticmethod
+    def bidirectional_bfs(*args, **kwargs) -> SearchResult:
+        """ Bidirectional Breadth First Search run to the end, see SOLVER.bidirectional_bfs_steps. """
+        return SOLVER.finish(SOLVER.bidirectional_bfs_steps(*args, **kwargs), kwargs.get('stats'))
+
+    @staticmethod
+    def jump_point_search(*args, **kwargs) -> SearchResult:
+        """ Jump Point Search run to the end, see SOLVER.jump_point_search_steps. """
+        return SOLVER.finish(SOLVER.jump_point_search_steps(*args, **kwargs), kwargs.get('stats'))
+
+    SEARCHES = {
+        'a_star': a_star.__func__,
+        'bfs': bfs.__func__,
+        'bidirectional_bfs': bidirectional_bfs.__func__,
+        'jps': jump_point_search.__func__,
+    }
+
+    @staticmethod
+    def search_options(algorithm: str, cells, cols: int, links=None) -> dict:
+        """
+            Returns the keyword arguments of a search of SOLVER.SEARCHES : the link masks (computed if not given),
+            except for jump point search, which reads the cells directly.
+
+            :param algorithm: Name of the algorithm (see SOLVER.SEARCHES).
+            :type  algorithm: str
+            :param links: Link masks of the cells (see CELLS.links), if already computed.
+        """
+        if algorithm == 'jps':
+            return {}
+        return {'links': CELLS.links(cells, cols) if links is None else links}
+
+    # searches run on a junction graph by SOLVER.solve, with their heuristic (jump point search reads the cells)
+    JUNCTION_HEURISTICS = {
+        'a_star': HEURISTICS.manhattan,
+        'bfs': HEURISTICS.zero,
+        'bidirectional_bfs': HEURISTICS.zero,
+    }
+
+    @staticmethod
+    def solve(maze, start: Tuple[int, int], end: Tuple[int, int], algorithm: str = 'a_star',
+              cols: Optional[int] = None, components=None, junctions=None, **kwargs) -> SearchResult:
+        """
+            Solves a maze without any display.
+
+            :param maze: MAZE_GENERATOR.lab matrix or flat buffer of cells.
+            :param start: (row, col) of the start cell.
+            :param end: (row, col) of the end cell.
+            :param algorithm: Name of the algorithm (see SOLVER.SEARCHES).
+            :type  algorithm: str
+            :param cols: Number of columns, required with a flat buffer.
+            :type  cols: int
+            :param components: Connected components of the maze (see app/components.py) : an unreachable end is rejected without searching.
+            :param junctions: Junction graph of the maze (see app/junctions.py), e.g. the one of a Grid : A* and the Breadth
+                              First Searches (as Dijkstra, the corridors have lengths) only search its junctions, the path is
+                              the same length. Its queued edits are applied first, a ValueError is raised if it isn't the one
+                              of the maze (see JUNCTION_GRAPH.belongs : O(1) for the cells it was built on, or the Grid's cells).
+        """
+        if algorithm not in SOLVER.SEARCHES:
+            raise ValueError(f"Unknown algorithm '{algorithm}', expected one of {sorted(SOLVER.SEARCHES)}.")
+        if components is not None and not components.connected(start, end):
+            return SearchResult(False, [], -1, 0)
+        cells, rows, cols = SOLVER.prepare(maze, cols)
+        if junctions is not None and algorithm in SOLVER.JUNCTION_HEURISTICS:
+            heuristic = kwargs.get('heuristic', SOLVER.JUNCTION_HEURISTICS[algorithm])
+            with junctions.lock:
+                junctions.apply_edits()
+                if not junctions.belongs(cells, cols):
+                    raise ValueError("The junction graph given isn't the one of this maze.")
+                return junctions.find_path(start, end, heuristic, stats=kwargs.get('stats'))
+        return SOLVER.SEARCHES[algorithm](cells, cols, start, end, **kwargs)
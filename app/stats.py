@@ -0,0 +1,146 @@
+# stats.py
+
+"""
+    Instrumentation of the searches.
+
+    A SearchStats given to a search (stats=...) is filled with its counters : without one, a search
+    only pays an `is not None` test per expanded cell. The timing and the optional cProfile and
+    tracemalloc captures wrap the search generator (see SearchStats.measure), so they work with
+    every stepper of the project, and only count the time spent inside the search : a visual search
+    advanced a few steps per frame isn't charged for the frames in between.
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Generator, List
+
+class SearchStats:
+    """
+    Counters and timings of one search.
+
+    :ivar str label: Name of the search, shown by SearchStats.lines.
+    :ivar int expanded: Number of expanded cells (counted live while the search runs, then the one of its result).
+    :ivar int pushed: Number of cells pushed in the open set (discovered cells for the Breadth First Searches).
+    :ivar int peak_open: Largest size of the open set (the frontiers for the Breadth First Searches).
+    :ivar int reopens: Number of pushes of a cell already pushed, with a better score.
+    :ivar int path_length: Number of moves of the path, -1 if not found (or not finished).
+    :ivar bool found: Has a path been found?
+    :ivar dict times: Seconds spent in each phase (see SearchStats.PHASES).
+    :ivar int peak_memory: Peak of the memory allocated by the search, in bytes, None unless memory is traced.
+    :ivar cProfile.Profile profiler: Profile of the search, None unless profiled.
+    """
+
+    # generation of the maze, preparation of the neighbors, search, reconstruction of the path
+    PHASES = ('generation', 'neighbors', 'search', 'reconstruction')
+
+    def __init__(self, label: str = '', profile: bool = False, memory: bool = False):
+        self.label = label
+        self.expanded = 0
+        self.pushed = 0
+        self.peak_open = 0
+        self.reopens = 0
+        self.path_length = -1
+        self.found = False
+        self.times = dict.fromkeys(SearchStats.PHASES, 0.0)
+        self.memory = memory
+        self.peak_memory = None
+        self.profiler = None
+        if profile:
+            # imported on demand : they are slow to import, for tools started many times
+            import cProfile
+            self.profiler = cProfile.Profile()
+
+    def open_size(self, size: int):
+        """ Records the current size of the open set. """
+        if size > self.peak_open:
+            self.peak_open = size
+
+    def add_time(self, phase: str, begin: float):
+        """ Adds the time since begin (time.perf_counter) to a phase. """
+        self.times[phase] += time.perf_counter() - begin
+
+    @contextmanager
+    def phase(self, phase: str):
+        """ Times the body of a with statement as a phase, e.g. with stats.phase('generation'): ... """
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, begin)
+
+    def measure(self, steps: Generator) -> Generator:
+        """
+            Wraps a search generator : yields its steps, times them (and profiles them, and traces their
+            memory, when asked), and returns its SearchResult with these stats.
+
+            :param steps: A search generator returning a SearchResult (see SOLVER, LPA_STAR, HPA_STAR).
+        """
+        profiler = self.profiler
+        started = self.memory and not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        if self.memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        # the phases timed by the search itself are not counted twice
+        inner = self.times['neighbors'] + self.times['reconstruction']
+        total = 0.0
+
+        try:
+            while True:
+                begin = time.perf_counter()
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    current = next(steps)
+                except StopIteration as stop:
+                    result = stop.value
+                    break
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+                    total += time.perf_counter() - begin
+                self.expanded += 1
+                yield current
+        finally:
+            steps.close()
+            if self.memory:
+                self.peak_memory = tracemalloc.get_traced_memory()[1] - baseline
+            if started:
+                tracemalloc.stop()
+            self.times['search'] += total - (self.times['neighbors'] + self.times['reconstruction'] - inner)
+
+        self.found = result.found
+        self.expanded = result.expanded
+        self.path_length = result.cost
+        return result._replace(stats=self)
+
+    def profile_report(self, sort: str = 'cumulative', limit: int = 20) -> str:
+        """ Returns the profile of the search as text (see pstats.Stats.print_stats), empty if not profiled. """
+        if self.profiler is None:
+            return ''
+        import io
+        import pstats
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def as_dict(self) -> Dict:
+        """ Returns the stats as a dict of numbers (JSON ready). """
+        return {'label': self.label, 'found': self.found, 'expanded': self.expanded, 'pushed': self.pushed,
+                'peak_open': self.peak_open, 'reopens': self.reopens, 'path_length': self.path_length,
+                'times': dict(self.times), 'peak_memory': self.peak_memory}
+
+    def lines(self) -> List[str]:
+        """ Returns the stats as short lines of text, for an overlay or a terminal. """
+        lines = [self.label] if self.label else []
+        lines += [f"{'expanded':<15}{self.expanded}",
+                  f"{'pushed':<15}{self.pushed}",
+                  f"{'peak open':<15}{self.peak_open}",
+                  f"{'reopens':<15}{self.reopens}",
+                  f"{'path':<15}{self.path_length if self.found else '-'}"]
+        lines += [f"{phase:<15}{seconds * 1000:.2f} ms" for phase, seconds in self.times.items() if seconds]
+        if self.peak_memory is not None:
+            lines.append(f"{'memory':<15}{self.peak_memory / 1024:.1f} KiB")
+        return lines
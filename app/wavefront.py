@@ -0,0 +1,140 @@
+# wavefront.py
+
+"""
+    Vectorized wavefront Breadth First Search (NumPy).
+
+    The whole frontier is advanced at once : each step shifts the indexes of the frontier cells in
+    the four directions and keeps, with boolean masks, the free cells not reached yet. A search from
+    one source gives the distance of every cell and the direction of its predecessor, so the path to
+    any target is then a cheap descent along these directions.
+
+    NumPy is an optional dependency : the rest of the project never imports this module.
+"""
+
+from typing import List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from app.cells import CELLS
+from app.solver import SearchResult
+
+class DistanceField(NamedTuple):
+    """
+    Distances from one source to every cell.
+
+    :ivar tuple source: (row, col) of the source.
+    :ivar int rows: Number of rows.
+    :ivar int cols: Number of columns.
+    :ivar numpy.ndarray distance: Number of moves from the source to every cell (rows x cols, int32), -1 if unreachable.
+    :ivar numpy.ndarray directions: Direction bit (CELLS.DOWN, UP, RIGHT, LEFT) of the predecessor of every reached cell (rows x cols, uint8), 0 for the source and unreachable cells.
+    :ivar int expanded: Number of reached cells.
+    """
+    source: Tuple[int, int]
+    rows: int
+    cols: int
+    distance: 'np.ndarray'
+    directions: 'np.ndarray'
+    expanded: int
+
+class WAVEFRONT:
+    """ This class has the vectorized searches. """
+
+    @staticmethod
+    def available() -> bool:
+        """ Returns True if NumPy is installed. """
+        return np is not None
+
+    @staticmethod
+    def require_numpy():
+        if np is None:
+            raise ImportError("The wavefront searches need NumPy : pip install numpy")
+
+    @staticmethod
+    def free_mask(cells, cols: int) -> 'np.ndarray':
+        """
+            Returns the free cells as a flat boolean array.
+
+            :param cells: Flat buffer of cell states (read without copy by np.frombuffer).
+            :param cols: Number of columns.
+            :type  cols: int
+        """
+        WAVEFRONT.require_numpy()
+        return np.frombuffer(cells, dtype=np.uint8) != CELLS.BARRIER
+
+    @staticmethod
+    def distance_field(cells, cols: int, source: Tuple[int, int]) -> DistanceField:
+        """
+            Breadth First Search from source to every cell, one step of array operations per distance.
+
+            :param cells: Flat buffer of cell states.
+            :param cols: Number of columns.
+            :type  cols: int
+            :param source: (row, col) of the source.
+        """
+        free = WAVEFRONT.free_mask(cells, cols)
+        size = free.size
+        rows = size // cols
+        distance = np.full(size, -1, dtype=np.int32)
+        directions = np.zeros(size, dtype=np.uint8)
+
+        # like the other searches, the source is expanded even on a wall
+        first = source[0] * cols + source[1]
+        # a free cell is reached once : it is taken out of free when reached
+        free = free.copy()
+        free[first] = False
+        distance[first] = 0
+        frontier = np.array([first], dtype=np.int64)
+        expanded = 1
+        step = 0
+        # (offset, direction bit of the predecessor seen from the new cell, cells of the frontier able to move)
+        moves = ((cols, CELLS.UP, lambda f, c: f < size - cols),
+                 (-cols, CELLS.DOWN, lambda f, c: f >= cols),
+                 (1, CELLS.LEFT, lambda f, c: c < cols - 1),
+                 (-1, CELLS.RIGHT, lambda f, c: c > 0))
+        while frontier.size:
+            step += 1
+            frontier_cols = frontier % cols
+            reached = []
+            for offset, back, inside in moves:
+                nexts = frontier[inside(frontier, frontier_cols)] + offset
+                nexts = nexts[free[nexts]]
+                # two cells of the frontier never reach the same cell with the same offset
+                free[nexts] = False
+                directions[nexts] = back
+                reached.append(nexts)
+            frontier = np.concatenate(reached)
+            distance[frontier] = step
+            expanded += frontier.size
+
+        return DistanceField(source, rows, cols, distance.reshape(rows, cols), directions.reshape(rows, cols), expanded)
+
+    @staticmethod
+    def path(field: DistanceField, target: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """
+            Returns the path (source to target, both included) following the predecessor directions,
+            in O(path length), None if the target can't be reached.
+        """
+        row, col = target
+        if field.distance[row, col] < 0:
+            return None
+        directions = field.directions
+        steps = {CELLS.DOWN: (1, 0), CELLS.UP: (-1, 0), CELLS.RIGHT: (0, 1), CELLS.LEFT: (0, -1)}
+        path = [(row, col)]
+        for _ in range(int(field.distance[row, col])):
+            d_row, d_col = steps[directions[row, col]]
+            row, col = row + d_row, col + d_col
+            path.append((row, col))
+        path.reverse()
+        return path
+
+    @staticmethod
+    def bfs(cells, cols: int, start: Tuple[int, int], end: Tuple[int, int]) -> SearchResult:
+        """ Breadth First Search from start to end with the wavefront (see SOLVER.bfs for the same result in pure Python). """
+        field = WAVEFRONT.distance_field(cells, cols, start)
+        path = WAVEFRONT.path(field, end)
+        if path is None:
+            return SearchResult(False, [], -1, field.expanded)
+        return SearchResult(True, path, len(path) - 1, field.expanded)
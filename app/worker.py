@@ -0,0 +1,141 @@
+# worker.py
+
+"""
+    Background jobs for the Interface : searches and maze generations run in a worker thread.
+
+    A job works on a snapshot of the grid (a copy of its cells and link masks), never on the grid
+    itself, so the user can go on editing while it runs. A search reports the cells it pushes and
+    expands in a shared event log (one integer per event : index << 3 | state) ; the UI thread
+    reads this log at its own pace and colors the grid. A job is cancelled by a flag polled at
+    every step of the search : a job made stale by an edit or by a new search stops at once.
+
+    The worker is a thread : a pure Python search holds the GIL most of the time, but the
+    interpreter switches threads every few milliseconds, so the pygame loop keeps handling events.
+"""
+
+import threading
+from array import array
+from typing import Callable, Generator, Optional, Tuple
+
+from app.maze_generator import MAZE_GENERATOR
+from app.solver import SearchResult
+from app.stats import SearchStats
+
+class Job:
+    """
+    A function running in a daemon thread. It is called with the job as its first argument,
+    to poll job.cancelled and to fill job.events.
+
+    :ivar array events: Event log of a search (array('q') of index << 3 | state), appended by the worker, read by the UI.
+    :ivar threading.Event cancelled: Set to stop the job, its result is then None.
+    :ivar threading.Event finished: Set when the function returned (or raised).
+    """
+
+    def __init__(self, function: Callable, *args, **kwargs):
+        self.events = array('q')
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+        self.value = None
+        self.error = None
+        self.thread = threading.Thread(target=self.run, args=(function, args, kwargs), daemon=True)
+
+    def run(self, function: Callable, args, kwargs):
+        try:
+            self.value = function(self, *args, **kwargs)
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.finished.set()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def done(self) -> bool:
+        return self.finished.is_set()
+
+    def result(self):
+        """ Returns the value of the function once finished, None if the job has been cancelled, raises its error. """
+        self.finished.wait()
+        if self.error is not None:
+            raise self.error
+        return None if self.cancelled.is_set() else self.value
+
+class WORKER:
+    """
+    Runs one background job at a time : submitting a job cancels the last one.
+
+    :ivar Job job: The last submitted job.
+    """
+
+    def __init__(self):
+        self.job = None
+
+    def submit(self, function: Callable, *args, **kwargs) -> Job:
+        """ Cancels the running job and starts function(job, *args, **kwargs) in a new thread. """
+        self.cancel()
+        self.job = Job(function, *args, **kwargs)
+        self.job.thread.start()
+        return self.job
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+
+    @staticmethod
+    def search(job: Job, steps: Callable[..., Generator[int, None, SearchResult]], cells, cols: int,
+               start: Tuple[int, int], end: Tuple[int, int], push_state: Optional[int] = None,
+               expand_state: Optional[int] = None, stats: Optional[SearchStats] = None, components=None,
+               **kwargs) -> Optional[SearchResult]:
+        """
+            Runs a headless search (see SOLVER.*_steps), logging its pushed and expanded cells in job.events.
+
+            :param job: The job running the search.
+            :param steps: The search generator function, e.g. SOLVER.a_star_steps.
+            :param cells: Snapshot of the cells.
+            :param cols: Number of columns.
+            :type  cols: int
+            :param start: (row, col) of the start cell.
+            :param end: (row, col) of the end cell.
+            :param push_state: State logged for a pushed cell (see app/cells.py), None to log nothing.
+            :param expand_state: State logged for an expanded cell, None to log nothing.
+            :param stats: Filled and timed in the worker (see app/stats.py).
+            :param components: Connected components of the grid (see app/components.py) : an unreachable end is
+                               rejected before searching. Their build and their updates run here, not in the UI thread.
+        """
+        if components is not None and not components.reachable(start, end):
+            return SearchResult(False, [], -1, 0)
+        append = job.events.append
+        source = start[0] * cols + start[1]
+
+        def on_push(index):
+            append(index << 3 | push_state)
+
+        def on_expand(index):
+            if index != source:
+                append(index << 3 | expand_state)
+
+        search = steps(cells, cols, start, end, on_push=None if push_state is None else on_push,
+                       on_expand=None if expand_state is None else on_expand, stepping=True, stats=stats, **kwargs)
+        if stats is not None:
+            search = stats.measure(search)
+
+        cancelled = job.cancelled
+        try:
+            while True:
+                next(search)
+                if cancelled.is_set():
+                    search.close()
+                    return None
+        except StopIteration as stop:
+            return stop.value
+
+    @staticmethod
+    def generate(job: Job, rows: int, cols: int, algorithm: str = 'prim', seed: Optional[int] = None,
+                 stats: Optional[SearchStats] = None) -> bytearray:
+        """ Generates the cells of a new maze (see MAZE_GENERATOR.create_cells), timed by stats if given. """
+        mg = MAZE_GENERATOR(rows, cols, algorithm, seed=seed)
+        if stats is None:
+            return mg.create_cells()
+        with stats.phase('generation'):
+            return mg.create_cells()
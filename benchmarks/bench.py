@@ -0,0 +1,246 @@
+# bench.py
+
+"""
+    Benchmarks of maze generation, solving, neighbor links and rendering.
+
+    Runs without a display (SDL dummy video driver), reports the median time of each measure
+    and its peak memory (tracemalloc), and writes JSON results that can be compared with a
+    previous run to catch regressions :
+
+        python -m benchmarks.bench --quick --output new.json --compare old.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from app.batch import BATCH
+from app.cells import CELLS
+from app.components import COMPONENTS
+from app.hierarchical import HPA_STAR
+from app.incremental import LPA_STAR
+from app.junctions import JUNCTION_GRAPH
+from app.maze_generator import MAZE_GENERATOR
+from app.solver import SOLVER
+from app.wavefront import WAVEFRONT
+
+SIZES = (20, 100, 500, 1000, 2000, 4000)
+QUICK_SIZES = (20, 100, 500)
+# the window of the Interface
+WINDOW_WIDTH = 700
+
+def measure(name: str, function: Callable[[], object], repeat: int, memory: bool = True, **extra) -> Dict:
+    """
+        Runs function repeat times and returns its median time, and its peak memory in one more traced run.
+
+        :param name: Name of the measure, the key used to compare two runs.
+        :type  name: str
+        :param function: The measured function.
+        :param repeat: Number of timed runs.
+        :type  repeat: int
+        :param memory: Measure the peak memory?
+        :type  memory: bool
+    """
+    times = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - begin)
+
+    result = {'name': name, 'median': statistics.median(times), 'min': min(times), 'repeat': repeat}
+    if memory:
+        tracemalloc.start()
+        function()
+        result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    result.update(extra)
+    print(f"{name:<40} {result['median'] * 1000:>12.3f} ms" +
+          (f" {result['peak_memory'] / 2 ** 20:>10.2f} MiB" if memory else ''), file=sys.stderr)
+    return result
+
+def bench_generation(sizes, repeat: int, memory: bool) -> List[Dict]:
+    results = []
+    for size in sizes:
+        for algorithm in MAZE_GENERATOR.ALGORITHMS:
+            results.append(measure(f'generate/{algorithm}/{size}',
+                                   lambda: MAZE_GENERATOR(size, size, algorithm, seed=0).create_cells(),
+                                   repeat, memory))
+    return results
+
+def bench_solving(sizes, repeat: int, memory: bool) -> List[Dict]:
+    results = []
+    for size in sizes:
+        mg = MAZE_GENERATOR(size, size, seed=0)
+        cells = mg.create_cells()
+        links = CELLS.links(cells, size)
+        for algorithm, search in sorted(SOLVER.SEARCHES.items()):
+            options = SOLVER.search_options(algorithm, cells, size, links)
+            found = search(cells, size, mg.entrance, mg.exit, **options)
+            results.append(measure(f'solve/{algorithm}/{size}', lambda: search(cells, size, mg.entrance, mg.exit, **options),
+                                   repeat, memory, expanded=found.expanded, cost=found.cost))
+
+        if WAVEFRONT.available():
+            field = WAVEFRONT.distance_field(cells, size, mg.entrance)
+            results.append(measure(f'solve/wavefront_field/{size}', lambda: WAVEFRONT.distance_field(cells, size, mg.entrance),
+                                   repeat, memory, expanded=field.expanded))
+            results.append(measure(f'solve/wavefront_path/{size}', lambda: WAVEFRONT.path(field, mg.exit), repeat, memory))
+
+        # hierarchical planner : clusters and their distances built once, then queries
+        hierarchy = measure(f'solve/hpa_build/{size}', lambda: HPA_STAR(cells, size, links=links).build(), 1, memory)
+        results.append(hierarchy)
+        planner = HPA_STAR(cells, size, links=links)
+        planner.build()
+        found = planner.find_path(mg.entrance, mg.exit)
+        results.append(measure(f'solve/hpa_query/{size}', lambda: planner.find_path(mg.entrance, mg.exit),
+                               repeat, memory, expanded=found.expanded, cost=found.cost))
+
+        # connected components : labeled in one pass over the rows, then every query is answered in O(1)
+        results.append(measure(f'solve/components_build/{size}', lambda: COMPONENTS(cells, size, links).build(), repeat, memory))
+
+        # junction graph : dead ends filled and corridors compressed once, then queries
+        results.append(measure(f'solve/junctions_build/{size}', lambda: JUNCTION_GRAPH(cells, size, links).build(), repeat, memory))
+        graph = JUNCTION_GRAPH(cells, size, links)
+        found = graph.find_path(mg.entrance, mg.exit)
+        results.append(measure(f'solve/junctions_query/{size}', lambda: graph.find_path(mg.entrance, mg.exit),
+                               repeat, memory, expanded=found.expanded, cost=found.cost))
+
+        # incremental planner : first plan, then a repair after opening one wall between two corridors
+        planner = LPA_STAR(cells, size, mg.entrance, mg.exit, links=links)
+        first = planner.compute_path()
+        results.append(measure(f'solve/lpa_first/{size}', lambda: LPA_STAR(cells, size, mg.entrance, mg.exit, links=links).compute_path(),
+                               repeat, memory, expanded=first.expanded, cost=first.cost))
+        # the repair edits its own copy of the maze, its link masks are kept up to date like a Grid does
+        edited, edited_links = bytearray(cells), bytearray(links)
+        planner = LPA_STAR(edited, size, mg.entrance, mg.exit, links=edited_links)
+        planner.compute_path()
+        wall = next(index for index in range(size + 1, len(cells) - size - 1)
+                    if cells[index] == CELLS.BARRIER and 0 < index % size < size - 1
+                    and cells[index - 1] != CELLS.BARRIER and cells[index + 1] != CELLS.BARRIER)
+
+        def repair():
+            edited[wall] ^= CELLS.BARRIER
+            CELLS.update_links(edited, edited_links, size, wall)
+            planner.update_cell(*divmod(wall, size))
+            return planner.compute_path()
+
+        results.append(measure(f'solve/lpa_repair/{size}', repair, repeat, memory))
+    return results
+
+def bench_neighbors(sizes, repeat: int, memory: bool) -> List[Dict]:
+    results = []
+    for size in sizes:
+        cells = MAZE_GENERATOR(size, size, seed=0).create_cells()
+        results.append(measure(f'neighbors/links/{size}', lambda: CELLS.links(cells, size), repeat, memory))
+        neighbors = SOLVER.neighbor_function(cells, size)
+        results.append(measure(f'neighbors/lazy_sweep/{size}', lambda: [neighbors(index) for index in range(len(cells))],
+                               repeat, memory))
+    return results
+
+def bench_rendering(sizes, repeat: int, memory: bool) -> List[Dict]:
+    import pygame
+    from maze import Grid
+    from app.renderer import RENDERER
+
+    pygame.init()
+    window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_WIDTH))
+    results = []
+    for size in sizes:
+        # only the cells on the view are drawn : the frame time depends on the window, not on the size
+        grid = Grid(window=window, rows=size, width=WINDOW_WIDTH, cells=MAZE_GENERATOR(size, size, 'eller', seed=0).create_cells())
+        renderer = RENDERER(window=window, grid=grid)
+
+        def full_frame():
+            grid.dirty = True
+            renderer.display()
+
+        def search_frame():
+            # a frame during a visualized search : a few cells set, then the whole view is drawn again
+            for index in range(0, min(len(grid.cells), 100 * 7), 7):
+                grid.set_state(index, grid.cells[index])
+            renderer.display()
+
+        results.append(measure(f'render/full/{size}', full_frame, repeat, memory))
+        results.append(measure(f'render/search_frame/{size}', search_frame, repeat, memory))
+    pygame.quit()
+    return results
+
+def bench_batch(sizes, repeat: int, memory: bool) -> List[Dict]:
+    """ Throughput of a batch with one process and with every core, to check that it scales. """
+    results = []
+    cores = os.cpu_count() or 1
+    for size in sizes:
+        count = max(4, min(64, 1_000_000 // (size * size)))
+        for processes in sorted({1, cores}):
+            results.append(measure(f'batch/processes_{processes}/{size}',
+                                   lambda: sum(1 for _ in BATCH.run(count, size, processes=processes, keep_cells=False)),
+                                   repeat, False, count=count, processes=processes))
+    return results
+
+BENCHES = {
+    'generation': bench_generation,
+    'solving': bench_solving,
+    'neighbors': bench_neighbors,
+    'rendering': bench_rendering,
+    'batch': bench_batch,
+}
+
+def compare(results: List[Dict], previous: Dict, threshold: float) -> List[str]:
+    """ Returns a line for every measure slower than (1 + threshold) times the previous run. """
+    old = {result['name']: result for result in previous['results']}
+    regressions = []
+    for result in results:
+        before = old.get(result['name'])
+        if before and before['median'] > 0 and result['median'] > before['median'] * (1 + threshold):
+            regressions.append(f"{result['name']}: {before['median'] * 1000:.3f} ms -> {result['median'] * 1000:.3f} ms "
+                               f"(x{result['median'] / before['median']:.2f})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of aMaze-ing.")
+    parser.add_argument('--sizes', type=int, nargs='+', help=f"maze sizes (default {SIZES})")
+    parser.add_argument('--quick', action='store_true', help=f"only the sizes {QUICK_SIZES}")
+    parser.add_argument('--only', choices=sorted(BENCHES), nargs='+', help="benchmarks to run (default all)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per measure, the median is reported")
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced run measuring the peak memory")
+    parser.add_argument('--output', help="JSON file for the results")
+    parser.add_argument('--compare', help="JSON results of a previous run")
+    parser.add_argument('--threshold', type=float, default=0.2, help="slowdown reported as a regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    results = []
+    for name in args.only or BENCHES:
+        results += BENCHES[name](sizes, args.repeat, not args.no_memory)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'sizes': list(sizes),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
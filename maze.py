@@ -1,8 +1,22 @@
+import argparse
+import time
 import pygame
 from app.colors import COLORS
+from app.cells import CELLS
 from app.algorithms import ALGORITHMS
+from app.components import COMPONENTS
+from app.field_cache import FIELD_CACHE
+from app.hierarchical import HPA_STAR
+from app.incremental import LPA_STAR
+from app.junctions import JUNCTION_GRAPH
+from app.renderer import RENDERER
+from app.maze_file import MAZE_FILE
 from app.maze_generator import MAZE_GENERATOR
-from typing import List, Tuple
+from app.solver import SOLVER
+from app.stats import SearchStats
+from app.wavefront import WAVEFRONT
+from app.worker import WORKER
+from typing import Optional, Tuple
 
 SCREEN_WIDTH = 700
 SCREEN_HEIGHT = 700
@@ -10,85 +24,93 @@ SCREEN_HEIGHT = 700
 class Spot:
     """
     A class object representing the Spot.
+    A Spot is a light view on one cell of the Grid : its state is stored in the Grid buffer.
 
+    :ivar Grid grid: The Grid owning the cell.
     :ivar int row: Row position of the Spot in the Grid.
     :ivar int col: Column position of the Spot in the Grid.
-    :ivar int width: The width number of the pixel (from the window).
-    :ivar int total_rows: The total number of rows in the Grid.
     """
 
-    def __init__(self, row_pos: int, col_pos: int, width: int, total_rows: int):
+    __slots__ = ('grid', 'row', 'col', 'index')
+
+    def __init__(self, grid: 'Grid', row_pos: int, col_pos: int):
+        self.grid = grid
         self.row = row_pos
         self.col = col_pos
-        self.x = row_pos * width
-        self.y = col_pos * width
-        self.color = COLORS.WHITE
-        self.neighbors = []
-        self.width = width
-        self.total_rows = total_rows
+        self.index = row_pos * grid.cols + col_pos
+
+    @property
+    def total_rows(self):
+        return self.grid.rows
+
+    @property
+    def total_cols(self):
+        return self.grid.cols
+
+    @property
+    def state(self):
+        return self.grid.cells[self.index]
+
+    @property
+    def color(self):
+        return COLORS.PALETTE[self.grid.cells[self.index]]
 
     def get_pos(self):
         return self.row, self.col
 
     def is_closed(self):
-        return self.color == COLORS.RED
+        return self.state == CELLS.CLOSED
 
     def is_open(self):
-        return self.color == COLORS.GREEN
+        return self.state == CELLS.OPEN
 
     def is_barrier(self):
-        return self.color == COLORS.BLACK
+        return self.state == CELLS.BARRIER
 
     def is_start(self):
-        return self.color == COLORS.ORANGE
+        return self.state == CELLS.START
 
     def is_end(self):
-        return self.color == COLORS.TURQUOISE
+        return self.state == CELLS.END
 
     def reset(self):
-        self.color = COLORS.WHITE
+        self.grid.set_state(self.index, CELLS.EMPTY)
 
     def make_start(self):
-        self.color = COLORS.ORANGE
+        self.grid.set_state(self.index, CELLS.START)
 
     def make_closed(self):
-        self.color = COLORS.RED
+        self.grid.set_state(self.index, CELLS.CLOSED)
 
     def make_open(self):
-        self.color = COLORS.GREEN
+        self.grid.set_state(self.index, CELLS.OPEN)
 
     def make_barrier(self):
-        self.color = COLORS.BLACK
+        self.grid.set_state(self.index, CELLS.BARRIER)
 
     def make_end(self):
-        self.color = COLORS.TURQUOISE
+        self.grid.set_state(self.index, CELLS.END)
 
     def make_path(self):
-        self.color = COLORS.PURPLE
-
-    def draw(self, window: pygame.Surface):
-        pygame.draw.rect(window, self.color, (self.x, self.y, self.width, self.width))
-
-    def update_neighbors(self, grid: List[List[int]]):
-        """ Updates Spot neighbors and puts them in the list (up, down, right, left). """
-    
-        self.neighbors = []
-
-        # LOWER NEIGHBOR SPOT
-        if self.row < self.total_rows - 1 and not grid[self.row + 1][self.col].is_barrier():
-            self.neighbors.append(grid[self.row + 1][self.col])
-
-        # UPPER NEIGHBOR SPOT
-        if self.row > 0 and not grid[self.row - 1][self.col].is_barrier():
-            self.neighbors.append(grid[self.row - 1][self.col])
+        self.grid.set_state(self.index, CELLS.PATH)
+
+    @property
+    def neighbors(self):
+        """ Returns the free neighbors (down, up, right, left), read from the link masks kept by the Grid. """
+        grid = self.grid
+        if grid.links is None:
+            indexes = SOLVER.neighbors(grid.cells, grid.rows, grid.cols, self.index)
+        else:
+            indexes = [self.index + offset for offset in grid.link_offsets[grid.links[self.index]]]
+        return [grid.get_spot(*divmod(index, grid.cols)) for index in indexes]
 
-        # RIGHT NEIGHBOR SPOT
-        if self.col < self.total_rows - 1 and not grid[self.row][self.col + 1].is_barrier():
-            self.neighbors.append(grid[self.row][self.col + 1])
+    def __eq__(self, other):
+        if not isinstance(other, Spot):
+            return NotImplemented
+        return self.grid is other.grid and self.index == other.index
 
-        # LEFT NEIGHBOR SPOT
-        if self.col > 0 and not grid[self.row][self.col - 1].is_barrier():
-            self.neighbors.append(grid[self.row][self.col - 1])
+    def __hash__(self):
+        return hash((id(self.grid), self.index))
 
     def __lt__(self, other):
         return False
@@ -96,131 +118,154 @@ class Spot:
 class Grid:
     """
     A class object representing the Grid.
+    The state of every cell is stored in one flat buffer (one byte per cell, see app/cells.py),
+    Spot instances are only created when a cell is asked for.
 
     :ivar pygame.Surface window: The pygame.Surface instance used as the window.
     :ivar int rows: The rows number of the Grid.
+    :ivar int cols: The columns number of the Grid.
     :ivar int width: The width number of the pixel (from the window).
     :ivar bool random_maze: Is the grid a random maze?.
-
+    :ivar bytearray cells: The state of every cell, row by row (any writable buffer, e.g. a mapped maze file, see app/maze_file.py).
+    :ivar bool indexed: Are the link masks and the components kept? False above MAX_INDEXED_CELLS (e.g. a big maze file) :
+                        the cells are then only read where a search goes, and never copied.
+    :ivar bytearray links: The link mask of every cell (its free neighbors, see CELLS.links), kept up to date by set_state, None if not indexed.
+    :ivar list wall_listeners: Functions called with the index of a cell each time it becomes or stops being a barrier.
+    :ivar COMPONENTS components: Connected components of the free cells (see app/components.py), on a copy of the cells kept up to date
+                                 by the background searches (see Grid.queue_edit), None if not indexed.
+    :ivar JUNCTION_GRAPH junctions: Junction graph of the maze (see app/junctions.py), on its own copy of the cells, built and
+                                    updated by the background searches like the components, None if not indexed.
+    :ivar bool dirty: Has a cell changed since the last frame (see app/renderer.py)?
     """
 
-    def __init__(self, window: pygame.Surface, rows: int, width: int, random_maze: bool = False):
+    # largest grid with link masks, components and junction graph : both are built over every cell (see CELLS.links), in memory
+    MAX_INDEXED_CELLS = 1 << 22
+    # cells cleared at once by clear_search
+    CLEAR_CHUNK = 1 << 20
+
+    def __init__(self, window: pygame.Surface, rows: int, width: int, random_maze: bool = False, cells=None,
+                 cols: Optional[int] = None):
         self.window = window
         self.rows = rows
+        self.cols = rows if cols is None else cols
         self.width = width
-
-        if random_maze:
-            self.Grid = self.make_random_grid(self.rows, self.width)
+        self.wall_listeners = []
+        self.dirty = True
+
+        if cells is not None:
+            if len(cells) != self.rows * self.cols:
+                raise ValueError(f"{len(cells)} cells given for a {self.rows}x{self.cols} grid.")
+            self.cells = cells
+        elif random_maze:
+            self.cells = self.make_random_grid(self.rows, self.width)
         else:
-            self.Grid = self.make_grid(self.rows, self.width)
-
-    def make_grid(self, rows: int, width: int) -> List[List[Spot]]:
+            self.cells = self.make_grid(self.rows, self.width)
+        self.indexed = len(self.cells) <= Grid.MAX_INDEXED_CELLS
+        self.link_offsets = CELLS.link_offsets(self.cols)
+        self.links = None
+        self.components = None
+        self.junctions = None
+        if self.indexed:
+            self.links = CELLS.links(self.cells, self.cols)
+            self.components = COMPONENTS(bytearray(self.cells), self.cols)
+            self.junctions = JUNCTION_GRAPH(bytearray(self.cells), self.cols, source=self.cells)
+            self.wall_listeners.append(self.queue_edit)
+
+    def make_grid(self, rows: int, width: int) -> bytearray:
         """
-            Returns a grid list according to rows and width.
+            Returns an empty grid buffer according to rows and cols.
 
             :param rows: Number of rows.
             :type  rows: int
             :param width: Width number of pixel.
             :type  width: int
         """
-        grid = []
-        gap = width // rows
-        for i in range(rows):
-            grid.append([])
-            for j in range(rows):
-                spot = Spot(row_pos=i, col_pos=j, width=gap, total_rows=rows)
-                grid[i].append(spot)
+        return bytearray(rows * self.cols)
 
-        return grid
-
-    def make_random_grid(self, rows: int, width: int) -> List[List[Spot]]:
+    def make_random_grid(self, rows: int, width: int) -> bytearray:
         """
-            Returns a random maze as grid list according to rows and width.
+            Returns a random maze as grid buffer according to rows and cols.
 
             :param rows: Number of rows.
             :type  rows: int
             :param width: Width number of pixel.
             :type  width: int
         """
-        mg = MAZE_GENERATOR(self.rows, self.rows)
-        maze = mg.create_maze()
-
-        grid = []
-        gap = width // rows
-        for i in range(rows):
-            grid.append([])
-            for j in range(rows):
-                spot = Spot(row_pos=i, col_pos=j, width=gap, total_rows=rows)
-                if maze[i][j] == MAZE_GENERATOR.MUR:
-                    spot.make_barrier()
-                grid[i].append(spot)
-        return grid
+        return MAZE_GENERATOR(rows, self.cols).create_cells()
 
-    def get_spot(self, row: int, col: int) -> Spot:
+    def set_state(self, index: int, state: int):
         """
-            Returns grid's row and column position from pixel position.
+            Sets the state of a cell.
 
-            :param row: Row spot position in the grid.
-            :type  row: int
-            :param col: Col spot position in the grid.
-            :type  col: int
+            :param index: Index of the cell in the buffer (row * cols + col).
+            :type  index: int
+            :param state: State code (see app/cells.py).
+            :type  state: int
         """
-        return self.Grid[row][col]
-
-    def get_all_spot(self) -> List[Spot]:
-        """ Returns all grid's spot. """
-        all_spot = []
-        for row in self.Grid:
-            for spot in row:
-                all_spot.append(spot)
-        return all_spot
-
-    def pos_to_grid(self, pos: Tuple[int, int]) -> Tuple[int, int]:
+        was_barrier = self.cells[index] == CELLS.BARRIER
+        self.cells[index] = state
+        self.dirty = True
+        if was_barrier != (state == CELLS.BARRIER):
+            if self.links is not None:
+                self.update_links(index)
+            for listener in self.wall_listeners:
+                listener(index)
+
+    def update_links(self, index: int):
         """
-            Returns grid's row and column position from pixel position.
+            Updates the link masks of a cell and of its four neighbors after it became or stopped being a barrier (see CELLS.update_links).
 
-            :param pos: Position of the pixel.
-            :type  pos: Tuple[int, int]
+            :param index: Index of the cell in the buffer (row * cols + col).
+            :type  index: int
         """
-        gap = self.width // self.rows # column // rows
-        y, x = pos
+        CELLS.update_links(self.cells, self.links, self.cols, index)
 
-        row = y // gap
-        col = x // gap
+    def queue_edit(self, index: int):
+        """
+            Wall listener : queues the edit for the components and the junction graph, the UI thread never builds
+            nor updates them (see COMPONENTS.reachable and JUNCTION_GRAPH.search_steps).
+        """
+        barrier = self.cells[index] == CELLS.BARRIER
+        self.components.queue_edit(index, barrier)
+        self.junctions.queue_edit(index, barrier)
 
-        return row, col
+    def clear_search(self):
+        """
+            Removes the open, closed and path cells left by a search, one chunk at a time :
+            only the chunks with such cells are written (a mapped file stays mostly untouched).
+        """
+        cells = self.cells
+        for begin in range(0, len(cells), Grid.CLEAR_CHUNK):
+            chunk = bytes(cells[begin:begin + Grid.CLEAR_CHUNK])
+            cleared = chunk.translate(CELLS.CLEAR_TABLE)
+            if cleared != chunk:
+                cells[begin:begin + len(chunk)] = cleared
+        self.dirty = True
+
+    def snapshot(self):
+        """
+            Returns (cells, links) for a background search (see app/worker.py) : copies for an indexed grid,
+            the grid's own cells (and no links) otherwise, too big to copy. A search on them is cancelled by
+            the wall edits anyway, and the marks of a search are never walls.
+        """
+        if not self.indexed:
+            return self.cells, None
+        return bytes(self.cells), bytes(self.links)
 
-    def get_spot_from_pos(self, pos: Tuple[int, int]) -> Spot:
+    def get_spot(self, row: int, col: int) -> Spot:
         """
-            Returns grid's row and column numbers from pixel position.
+            Returns the Spot at row and column position (negative positions count from the end).
 
-            :param pos: Position of the pixel.
-            :type  pos: Tuple[int, int]
+            :param row: Row spot position in the grid.
+            :type  row: int
+            :param col: Col spot position in the grid.
+            :type  col: int
         """
-        # getting (row, col) coordinates from pos.
-        row, col = self.pos_to_grid(pos)
-        # returning spot from the grid row & col pos.
-        return self.get_spot(row, col)
-
-    def get_grid(self) -> List[List[Spot]]:
-        return self.Grid
-
-    def draw_grid(self):
-        """ Draws the grid. """
-        gap = self.width // self.rows
-        for i in range(self.rows):
-            pygame.draw.line(self.window, COLORS.GREY, (0, i * gap), (self.width, i * gap))
-            for j in range(self.rows):
-                pygame.draw.line(self.window, COLORS.GREY, (j * gap, 0), (j * gap, self.width))
-
-    def update(self):
-        """ Updates the grid. """
-        # draw all spots
-        for row in self.Grid:
-            for spot in row:
-                spot.draw(self.window)
-        # draw whole grid
-        self.draw_grid()
+        if row < 0:
+            row += self.rows
+        if col < 0:
+            col += self.cols
+        return Spot(self, row, col)
 
 class Interface:
     """
@@ -231,20 +276,130 @@ class Interface:
     :ivar int width: The window width.
     """
 
-    def __init__(self, window: pygame.Surface, height: int, width: int):
+    # time given to the running search at each frame (seconds)
+    FRAME_BUDGET = 0.010
+    MAX_STEPS_PER_FRAME = 1 << 16
+    # zoom factor of one mouse wheel notch or one +/- key press
+    ZOOM_STEP = 1.25
+
+    def __init__(self, window: pygame.Surface, height: int, width: int, maze_file: Optional[str] = None,
+                 rows: int = 20, cols: Optional[int] = None, profile: bool = False, trace_memory: bool = False):
         self.WINDOW = window
 
         self.GRID_HEIGHT = height
         self.GRID_WIDTH = width
 
-        self.GRID_ROWS = 20
+        self.GRID_ROWS = rows
+        self.GRID_COLS = rows if cols is None else cols
+
+        # running search stepper, advanced at each frame, and cancelled by a wall edit if stale_on_edit
+        self.job = None
+        self.stale_on_edit = False
+        # background thread of the searches and generations (see app/worker.py)
+        self.worker = WORKER()
+        self.paused = False
+        self.steps_per_frame = 1
+        # A*, BFS and bidirectional BFS search the junction graph of the grid (see Grid.junctions) once turned on with the X key :
+        # off, they show their exploration cell by cell (a perfect maze is filled entirely, no junction is expanded)
+        self.use_junctions = False
+
+        # stats of the last search (or generation), shown over the grid with the I key
+        self.stats = None
+        self.show_stats = False
+        # capture a cProfile profile (printed when the search ends) / the peak memory of each search
+        self.profile = profile
+        self.trace_memory = trace_memory
+
+        if maze_file:
+            self.load_grid(maze_file)
+        else:
+            self.new_grid()
+
+    def new_grid(self, cells=None):
+        """
+            Shows a new random maze, with the start and end at its entrance and exit.
+
+            :param cells: Cells of the maze, generated here if not given (see Interface.new_grid_steps).
+        """
+        if cells is None:
+            self.stats = SearchStats('generation')
+            with self.stats.phase('generation'):
+                cells = MAZE_GENERATOR(self.GRID_ROWS, self.GRID_COLS).create_cells()
+        self.set_grid(Grid(window=self.WINDOW, rows=self.GRID_ROWS, width=self.GRID_WIDTH, cells=cells, cols=self.GRID_COLS))
+        self.start = self.grid.get_spot(0, 1)
+        self.start.make_start()
+        self.end   = self.grid.get_spot(-1, -2)
+        self.end.make_end()
+
+    def set_grid(self, grid: 'Grid'):
+        """ Shows a new grid, with a new renderer, and drops the planner and the cached fields of the last one. """
+        self.grid = grid
+        self.grid.wall_listeners.append(self.on_wall_changed)
+        self.renderer = RENDERER(window=self.WINDOW, grid=self.grid)
+        self.camera = self.renderer.camera
+        # incremental planner, kept between two D key presses
+        self.planner = None
+        # hierarchical planner, its clusters are kept between two H key presses
+        self.hierarchy = None
+        # the planners below index every cell : not on a grid too big to be indexed (see Grid.indexed)
+        # distance fields for the F key, dropped by the wall edits that change them
+        self.cache = FIELD_CACHE(self.grid.cells, self.grid.cols) if WAVEFRONT.available() and self.grid.indexed else None
+        if self.cache:
+            self.grid.wall_listeners.append(self.cache.on_wall_changed)
+
+    def load_grid(self, path: str):
+        """
+            Opens a maze file (see app/maze_file.py), of any size, with its start and end.
+            The grid edits the mapped cells copy-on-write : the file is never changed.
 
-        self.grid = Grid(window=self.WINDOW, rows=self.GRID_ROWS, width=self.GRID_WIDTH, random_maze=True)
-        self.start = self.grid.get_grid()[0][1]
+            :param path: Path of the maze file.
+            :type  path: str
+        """
+        maze = MAZE_FILE.load(path, writable=True)
+        self.set_grid(Grid(window=self.WINDOW, rows=maze.rows, width=self.GRID_WIDTH, cells=maze.cells, cols=maze.cols))
+        self.start = self.grid.get_spot(*maze.start)
         self.start.make_start()
-        self.end   = self.grid.get_grid()[-1][-2]
+        self.end   = self.grid.get_spot(*maze.end)
         self.end.make_end()
 
+    def new_grid_steps(self):
+        """ Stepper generating a new maze in the background worker : the current grid stays on screen, and usable, until it is ready. """
+        job = self.worker.submit(WORKER.generate, self.GRID_ROWS, self.GRID_COLS, stats=self.new_stats('generation'))
+        try:
+            while not job.done():
+                yield ALGORITHMS.WAIT
+        except GeneratorExit:
+            job.cancel()
+            raise
+        cells = job.result()
+        if cells is None:
+            return False
+        self.new_grid(cells)
+        return True
+
+    def new_stats(self, label: str) -> SearchStats:
+        """ Returns the stats of a new search (with the profile and memory captures asked for), shown by the overlay. """
+        self.stats = SearchStats(label, profile=self.profile, memory=self.trace_memory)
+        return self.stats
+
+    def search_label(self, name: str) -> str:
+        """ Returns the label of the stats of a search, telling whether it runs on the junction graph (see Interface.use_junctions). """
+        return f"{name} (junctions)" if self.use_junctions and self.grid.junctions else name
+
+    def get_spot_from_pos(self, pos: Tuple[int, int]) -> Optional[Spot]:
+        """ Returns the Spot under a pixel of the window (through the camera), None out of the grid. """
+        cell = self.camera.cell_at(pos)
+        return self.grid.get_spot(*cell) if cell else None
+
+    def on_wall_changed(self, index: int):
+        """ Forwards a wall edit to the incremental and hierarchical planners, and stops the search it made stale. """
+        if self.job and self.stale_on_edit:
+            self.cancel_job()
+        if self.planner:
+            self.planner.update_cell(*divmod(index, self.grid.cols))
+        if self.hierarchy:
+            self.hierarchy.update_cell(*divmod(index, self.grid.cols))
+
     def process_events(self):
         """ 
             Process all pygame events. 
@@ -258,10 +413,14 @@ class Interface:
             # LEFT MOUSE BUTTON (LMB)  -> set spot
             if pygame.mouse.get_pressed()[0]:
                 pos: Tuple[int, int] = pygame.mouse.get_pos()
-                spot: Spot = self.grid.get_spot_from_pos(pos=pos)
+                spot: Optional[Spot] = self.get_spot_from_pos(pos=pos)
+
+                # out of the grid
+                if not spot:
+                    pass
 
                 # checking if "start" already exists AND if spot from (row, col) is not the "end".
-                if not self.start and spot != self.end:
+                elif not self.start and spot != self.end:
                     self.start = spot
                     self.start.make_start()
 
@@ -277,62 +436,176 @@ class Interface:
             # RIGHT MOUSE BUTTON (RMB) -> reset spot
             elif pygame.mouse.get_pressed()[2]:
                 pos: Tuple[int, int] = pygame.mouse.get_pos()
-                spot: Spot = self.grid.get_spot_from_pos(pos=pos)
+                spot: Optional[Spot] = self.get_spot_from_pos(pos=pos)
+
+                if spot:
+                    spot.reset()
+                    if spot == self.start:
+                        self.start = None
+                    elif spot == self.end:
+                        self.end = None
 
-                spot.reset()
-                if spot == self.start:
-                    self.start = None
-                elif spot == self.end:
-                    self.end = None
+            # MIDDLE MOUSE BUTTON (MMB) DRAG  -> pan the view
+            if event.type == pygame.MOUSEMOTION and event.buttons[1]:
+                self.camera.pan(*event.rel)
+
+            # MOUSE WHEEL  -> zoom at the cursor
+            if event.type == pygame.MOUSEWHEEL:
+                self.camera.zoom_at(Interface.ZOOM_STEP ** event.y, pygame.mouse.get_pos())
 
             if event.type == pygame.KEYDOWN:
                 # A KEY DOWN  -> apply A* path finding algorithm
                 if event.key == pygame.K_a and self.start and self.end:
-                    for spot in self.grid.get_all_spot():
-                        spot.update_neighbors(self.grid.get_grid())
-
-                    ALGORITHMS.A_star(
-                        grid_obj=self.grid,
-                        start=self.start,
-                        end=self.end,
-                        visualize=lambda: self.display_frame(screen=self.WINDOW)
-                    )
+                    self.start_job(ALGORITHMS.A_star_steps(grid_obj=self.grid, start=self.start, end=self.end, junctions=self.use_junctions,
+                                                             stats=self.new_stats(self.search_label('A*')), worker=self.worker))
 
                 # Z KEY DOWN  -> apply breadth first search algorithm
                 if event.key == pygame.K_z and self.start and self.end:
-                    for spot in self.grid.get_all_spot():
-                        spot.update_neighbors(self.grid.get_grid())
-
-                    ALGORITHMS.breadth_first_search(
-                        grid_obj=self.grid,
-                        start=self.start,
-                        end=self.end,
-                        visualize=lambda: self.display_frame(screen=self.WINDOW)
-                    )
-
-                # C KEY DOWN  -> reset the grid
+                    self.start_job(ALGORITHMS.breadth_first_search_steps(grid_obj=self.grid, start=self.start, end=self.end, junctions=self.use_junctions,
+                                                                           stats=self.new_stats(self.search_label('BFS')), worker=self.worker))
+
+                # B KEY DOWN  -> apply bidirectional breadth first search algorithm
+                if event.key == pygame.K_b and self.start and self.end:
+                    self.start_job(ALGORITHMS.breadth_first_search_steps(grid_obj=self.grid, start=self.start, end=self.end, bidirectional=True,
+                                                                           junctions=self.use_junctions,
+                                                                           stats=self.new_stats(self.search_label('bidirectional BFS')), worker=self.worker))
+
+                # J KEY DOWN  -> apply jump point search algorithm
+                if event.key == pygame.K_j and self.start and self.end:
+                    self.start_job(ALGORITHMS.jump_point_search_steps(grid_obj=self.grid, start=self.start, end=self.end,
+                                                                        stats=self.new_stats('JPS'), worker=self.worker))
+
+                # D KEY DOWN  -> apply (incremental) Lifelong Planning A* algorithm
+                if event.key == pygame.K_d and self.start and self.end:
+                    self.cancel_job()
+                    if not self.planner or self.planner.start != self.start.get_pos() or self.planner.end != self.end.get_pos():
+                        self.planner = LPA_STAR(self.grid.cells, self.grid.cols, self.start.get_pos(), self.end.get_pos(), links=self.grid.links)
+
+                    self.start_job(ALGORITHMS.lifelong_planning_a_star_steps(grid_obj=self.grid, planner=self.planner, start=self.start, end=self.end,
+                                                                               stats=self.new_stats('LPA*')))
+
+                # H KEY DOWN  -> apply hierarchical path finding (HPA*), on clusters kept between two searches
+                if event.key == pygame.K_h and self.start and self.end and self.grid.indexed:
+                    self.cancel_job()
+                    if not self.hierarchy:
+                        self.hierarchy = HPA_STAR(self.grid.cells, self.grid.cols, links=self.grid.links)
+
+                    self.start_job(ALGORITHMS.hierarchical_steps(grid_obj=self.grid, planner=self.hierarchy, start=self.start, end=self.end,
+                                                                   stats=self.new_stats('HPA*')))
+
+                # X KEY DOWN  -> A*, BFS and bidirectional BFS on the junction graph (dead ends filled, corridors compressed) or on the cells
+                if event.key == pygame.K_x:
+                    self.use_junctions = not self.use_junctions
+
+                # F KEY DOWN  -> path from the cached distance fields (computed once per start, or end, and maze)
+                if event.key == pygame.K_f and self.start and self.end and self.cache:
+                    self.start_job(ALGORITHMS.cached_path_steps(grid_obj=self.grid, cache=self.cache, start=self.start, end=self.end,
+                                                                  stats=self.new_stats('cached field')))
+
+                # C KEY DOWN  -> new maze, generated in the background
                 if event.key == pygame.K_c:
-                    self.grid = Grid(window=self.WINDOW, rows=self.GRID_ROWS, width=self.GRID_WIDTH, random_maze=True)
-                    self.start = self.grid.get_grid()[0][1]
-                    self.start.make_start()
-                    self.end   = self.grid.get_grid()[-1][-2]
-                    self.end.make_end()
+                    self.cancel_job()
+                    self.start_job(self.new_grid_steps(), stale_on_edit=False)
 
                 # V KEY DOWN  -> original grid
                 if event.key == pygame.K_v:
-                    for spot in self.grid.get_all_spot():
-                        if not (spot.is_start() or spot.is_end() or spot.is_barrier()):
-                            spot.reset()
+                    self.cancel_job()
+                    self.grid.clear_search()
+
+                # ESCAPE KEY DOWN  -> cancel the running search
+                if event.key == pygame.K_ESCAPE:
+                    self.cancel_job()
+
+                # P KEY DOWN  -> pause / resume the running search
+                if event.key == pygame.K_p:
+                    self.paused = not self.paused
+
+                # PAGE DOWN / PAGE UP / END / HOME KEY DOWN  -> pan the view by half a window
+                moves = {pygame.K_PAGEDOWN: (-1, 0), pygame.K_PAGEUP: (1, 0), pygame.K_END: (0, -1), pygame.K_HOME: (0, 1)}
+                if event.key in moves:
+                    d_x, d_y = moves[event.key]
+                    self.camera.pan(d_x * self.camera.width / 2, d_y * self.camera.height / 2)
+
+                # I KEY DOWN  -> show / hide the stats of the last search
+                if event.key == pygame.K_i:
+                    self.show_stats = not self.show_stats
+
+                # G KEY DOWN  -> show / hide the grid lines
+                if event.key == pygame.K_g:
+                    self.renderer.toggle_lines()
+
+                # + / - / 0 KEY DOWN  -> zoom in / out at the center, show the whole grid
+                center = (self.camera.width // 2, self.camera.height // 2)
+                if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    self.camera.zoom_at(Interface.ZOOM_STEP, center)
+                if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    self.camera.zoom_at(1 / Interface.ZOOM_STEP, center)
+                if event.key in (pygame.K_0, pygame.K_KP0):
+                    self.camera.fit()
+
+                # UP / DOWN KEY DOWN  -> faster / slower visualization
+                if event.key == pygame.K_UP:
+                    self.steps_per_frame = min(self.steps_per_frame * 2, Interface.MAX_STEPS_PER_FRAME)
+                if event.key == pygame.K_DOWN:
+                    self.steps_per_frame = max(self.steps_per_frame // 2, 1)
 
         return True
 
+    def start_job(self, job, stale_on_edit: bool = True):
+        """
+            Starts a search stepper (see ALGORITHMS), advanced by advance() at each frame.
+            A search still running is stopped and its cells are cleared.
+
+            :param job: The stepper of the search.
+            :param stale_on_edit: Cancel the job when a wall is edited?
+            :type  stale_on_edit: bool
+        """
+        if self.job:
+            self.cancel_job()
+            self.grid.clear_search()
+        self.job = job
+        self.stale_on_edit = stale_on_edit
+        self.paused = False
+
+    def cancel_job(self):
+        """ Stops the running search, its cells stay on the grid. """
+        if self.job:
+            self.job.close()
+            self.job = None
+
+    def advance(self):
+        """ Advances the running search for at most steps_per_frame steps and FRAME_BUDGET seconds. """
+        if not self.job or self.paused:
+            return
+
+        deadline = time.perf_counter() + Interface.FRAME_BUDGET
+        for _ in range(self.steps_per_frame):
+            try:
+                if next(self.job) is ALGORITHMS.WAIT:
+                    # the background worker is behind : the rest of the frame is left to it
+                    return
+            except StopIteration:
+                self.job = None
+                if self.stats and self.stats.profiler:
+                    print(self.stats.profile_report())
+                return
+            if time.perf_counter() > deadline:
+                return
+
     def display_frame(self, screen):
-        """ Displays everything to the screen. """
-        screen.fill(COLORS.WHITE)
-        self.grid.update()
-        pygame.display.update()
+        """ Displays to the screen what changed since the last frame. """
+        self.renderer.set_overlay(self.stats.lines() if self.show_stats and self.stats else None)
+        self.renderer.display()
 
 def main():
+    parser = argparse.ArgumentParser(description="Maze solving visualization.")
+    parser.add_argument('maze_file', nargs='?', help="maze file to open (see app/maze_file.py)")
+    parser.add_argument('--rows', type=int, default=20, help="rows of the random mazes")
+    parser.add_argument('--cols', type=int, help="columns of the random mazes (default rows)")
+    parser.add_argument('--profile', action='store_true', help="profile each search (cProfile), printed when it ends")
+    parser.add_argument('--trace-memory', action='store_true', help="trace the peak memory of each search (tracemalloc)")
+    args = parser.parse_args()
+
     # Initialize Pygame.
     pygame.init()
 
@@ -346,7 +619,9 @@ def main():
     clock = pygame.time.Clock()
 
     # Create an instance of the Window class
-    interface = Interface(window=screen, height=SCREEN_HEIGHT, width=SCREEN_WIDTH)
+    interface = Interface(window=screen, height=SCREEN_HEIGHT, width=SCREEN_WIDTH,
+                          maze_file=args.maze_file, rows=args.rows, cols=args.cols,
+                          profile=args.profile, trace_memory=args.trace_memory)
 
     # Main game loop
     while run:
@@ -354,6 +629,9 @@ def main():
         # Process events (keystrokes, mouse clicks, etc)
         run = interface.process_events()
 
+        # Advance the running search within the frame budget
+        interface.advance()
+
         # Draw the current frame
         interface.display_frame(screen)
 
@@ -361,6 +639,7 @@ def main():
         clock.tick(fps)
 
     # Close window and exit
+    interface.worker.cancel()
     pygame.quit()
 
 if __name__ == "__main__":